@@ -0,0 +1,195 @@
+import os  # Importa a biblioteca os para as listas de ficheiros e a memória do sistema
+import sys  # Importa a biblioteca sys para o código de saída
+import csv  # Importa a biblioteca csv para o ficheiro de resultados
+import glob  # Importa a biblioteca glob para listar as instâncias de uma pasta
+import json  # Importa a biblioteca json para o ficheiro de resultados
+import argparse  # Importa a biblioteca argparse para a linha de comandos
+import multiprocessing as mp  # Importa a biblioteca multiprocessing para o conjunto de processos
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from Instance import read_data, instance_shape
+from LowerBound import lower_bound
+from Benchmark import read_references, instance_name
+from Solver import ALGORITHMS, check_parameters, solve
+
+# Resolução em lote: todas as combinações (instância, algoritmo, semente) num conjunto de processos
+# O custo de cada trabalho é estimado pelo tamanho n x m do cabeçalho e os trabalhos são lançados do maior para o menor;
+# um trabalho só arranca se couber no limite de memória (senão passa à frente um mais pequeno que caiba)
+# A matriz de custos de cada instância é lida uma só vez (cache binária) e partilhada pelos trabalhos que a usam
+# através do memory-map: só conta uma vez para a memória enquanto houver trabalhos dessa instância a correr
+
+# Colunas do ficheiro de resultados em CSV (em JSON cada linha é um registo completo)
+RESULT_FIELDS = ['instance', 'file', 'algorithm', 'seed', 'customers', 'warehouses', 'cost', 'time', 'evaluations',
+                 'lower_bound', 'gap', 'optimum', 'optimum_gap', 'worker', 'error']
+
+# Ficheiros de instâncias a partir de listas (.lst, caminhos relativos à pasta da lista), pastas ou ficheiros soltos
+# Os ficheiros sem cabeçalho "m n" (por exemplo capinfo.txt) são ignorados
+def batch_files(sources):
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            candidates = sorted(glob.glob(os.path.join(source, '*.txt')))
+        elif source.endswith('.lst'):
+            with open(source) as file:
+                candidates = [os.path.join(os.path.dirname(source), line.strip()) for line in file if line.strip()]
+        else:
+            candidates = [source]
+        for filename in candidates:
+            try:
+                instance_shape(filename)
+            except ValueError:
+                continue
+            if filename not in files:
+                files.append(filename)
+    return files
+
+# Trabalhos do lote ordenados do maior para o menor (n x m), com as estimativas de memória em bytes:
+# 'memory' é a memória de trabalho própria (matrizes n x m temporárias da avaliação) e 'shared' a matriz de custos
+def batch_jobs(files, algorithms, seeds):
+    jobs = []
+    for filename in files:
+        num_customers, num_warehouses = instance_shape(filename)
+        size = num_customers * num_warehouses
+        for algorithm in algorithms:
+            for seed in seeds:
+                jobs.append({'file': filename, 'algorithm': algorithm, 'seed': seed, 'customers': num_customers,
+                             'warehouses': num_warehouses, 'work': size, 'memory': 8 * size, 'shared': 8 * size})
+    jobs.sort(key=lambda job: -job['work'])  # Ordenação estável: trabalhos da mesma instância ficam juntos
+    return jobs
+
+# Memória física total (limite por omissão: metade)
+def physical_memory():
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+def _run_batch_job(filename, algorithm, seed, time_limit, max_evaluations, with_bound, parameters):
+    record = solve(filename, algorithm, seed, time_limit, max_evaluations, 0, None, with_bound, **parameters)
+    record['worker'] = os.getpid()
+    return record
+
+# Escreve cada resultado assim que o trabalho termina (CSV ou uma linha JSON por trabalho, conforme a extensão)
+def _open_results(filename, append):
+    exists = append and os.path.exists(filename) and os.path.getsize(filename) > 0
+    file = open(filename, 'a' if append else 'w', newline='')
+    if filename.endswith('.csv'):
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        if not exists:
+            writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda record: file.write(json.dumps(record) + "\n")
+    return file, write
+
+# Trabalhos já presentes no ficheiro de resultados (para continuar um lote interrompido)
+def finished_jobs(filename):
+    if not os.path.exists(filename):
+        return set()
+    with open(filename, newline='') as file:
+        rows = csv.DictReader(file) if filename.endswith('.csv') else (json.loads(line) for line in file if line.strip())
+        return {(row['file'], row['algorithm'], int(row['seed'])) for row in rows if not row.get('error')}
+
+# Corre o lote e devolve os registos; output recebe cada registo logo que o trabalho termina
+# workers: processos (por omissão um por processador); memory_cap: limite de memória estimada em bytes
+# parameters: parâmetros por algoritmo, {algoritmo: {nome: valor}}; resume: salta os trabalhos já no ficheiro output
+def run_batch(files, algorithms, seeds, output, workers=None, memory_cap=None, time_limit=None, max_evaluations=None,
+              with_bound=False, parameters=None, resume=False, verbose=True):
+    workers = workers or os.cpu_count()
+    memory_cap = memory_cap or physical_memory() // 2
+    parameters = parameters or {}
+    done = finished_jobs(output) if resume else set()
+    pending = [job for job in batch_jobs(files, algorithms, seeds)
+               if (job['file'], job['algorithm'], job['seed']) not in done]
+    references = read_references()
+
+    # Caches (e limites inferiores) construídas uma vez aqui, antes de os trabalhos as abrirem em paralelo
+    for filename in dict.fromkeys(job['file'] for job in pending):
+        data = read_data(filename)
+        if with_bound:
+            lower_bound(data)
+
+    context = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+    running = {}
+    results = []
+    file, write = _open_results(output, resume)
+
+    def memory_in_use():
+        shared = {job['file']: job['shared'] for job in running.values()}
+        return sum(job['memory'] for job in running.values()) + sum(shared.values())
+
+    def fits(job):
+        shared = 0 if any(other['file'] == job['file'] for other in running.values()) else job['shared']
+        return memory_in_use() + job['memory'] + shared <= memory_cap
+
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            while pending or running:
+                # Lança o maior trabalho que cabe; sem nada a correr lança o maior mesmo que passe o limite
+                while len(running) < workers and pending:
+                    job = next((job for job in pending if fits(job)), None)
+                    if job is None:
+                        if running:
+                            break
+                        job = pending[0]
+                    pending.remove(job)
+                    future = pool.submit(_run_batch_job, job['file'], job['algorithm'], job['seed'], time_limit,
+                                         max_evaluations, with_bound, parameters.get(job['algorithm'], {}))
+                    running[future] = job
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = running.pop(future)
+                    record = {'instance': instance_name(job['file']), 'file': job['file'], 'algorithm': job['algorithm'],
+                              'seed': job['seed'], 'customers': job['customers'], 'warehouses': job['warehouses']}
+                    try:
+                        result = future.result()
+                    except Exception as error:  # O erro fica registado e o lote continua
+                        record['error'] = repr(error)
+                    else:
+                        record.update({name: result[name] for name in ('cost', 'time', 'evaluations', 'lower_bound',
+                                                                        'gap', 'worker')})
+                        optimum = references.get(record['instance'])
+                        record['optimum'] = optimum
+                        record['optimum_gap'] = 100 * (result['cost'] - optimum) / optimum if optimum else None
+                    write(record)
+                    file.flush()
+                    results.append(record)
+                    if verbose:
+                        status = f"custo={record['cost']:.5f} tempo={record['time']:.3f}s" if 'cost' in record else record['error']
+                        print(f"{record['instance']:12s} {job['algorithm']:8s} seed={job['seed']:<4d} {status} "
+                              f"(faltam {len(pending) + len(running)})")
+    finally:
+        file.close()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve um lote de instâncias em paralelo (maiores primeiro)")
+    parser.add_argument('sources', nargs='+', help="Listas de ficheiros (.lst), pastas ou ficheiros de instâncias")
+    parser.add_argument('-a', '--algorithms', nargs='+', default=['grasp'], choices=['all', *ALGORITHMS])
+    parser.add_argument('-s', '--seeds', nargs='+', type=int, default=[42])
+    parser.add_argument('-o', '--output', default='resultados.jsonl', help="Ficheiro de resultados (.csv ou JSON por linha)")
+    parser.add_argument('-w', '--workers', type=int, help="Processos em paralelo (por omissão um por processador)")
+    parser.add_argument('--memory-cap', type=float, metavar='MB', help="Limite de memória estimada (por omissão metade da RAM)")
+    parser.add_argument('-t', '--time-limit', type=float, help="Limite de tempo por trabalho (segundos)")
+    parser.add_argument('-e', '--max-evaluations', type=int, help="Limite de avaliações por trabalho")
+    parser.add_argument('--bound', action='store_true', help="Calcula o limite inferior e regista o gap")
+    parser.add_argument('--parameters', type=json.loads, default={},
+                        help="Parâmetros por algoritmo em JSON, ex.: '{\"tabu\": {\"num_candidates\": 20}}'")
+    parser.add_argument('--resume', action='store_true', help="Salta os trabalhos que já estão no ficheiro de resultados")
+    args = parser.parse_args(argv)
+
+    algorithms = list(ALGORITHMS) if 'all' in args.algorithms else args.algorithms
+    for algorithm, values in args.parameters.items():
+        if algorithm not in ALGORITHMS:
+            parser.error(f"Algoritmo desconhecido: {algorithm}")
+        try:
+            check_parameters(algorithm, values)
+        except ValueError as error:
+            parser.error(str(error))
+    files = batch_files(args.sources)
+    if not files:
+        parser.error("Nenhuma instância encontrada")
+    memory_cap = int(args.memory_cap * 1024 * 1024) if args.memory_cap else None
+    results = run_batch(files, algorithms, args.seeds, args.output, args.workers, memory_cap, args.time_limit,
+                        args.max_evaluations, args.bound, args.parameters, args.resume)
+    return 1 if any('error' in record for record in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
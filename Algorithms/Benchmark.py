@@ -0,0 +1,219 @@
+import os  # Importa a biblioteca os para localizar os ficheiros de teste
+import sys  # Importa a biblioteca sys para o código de saída
+import csv  # Importa a biblioteca csv para guardar os resultados
+import glob  # Importa a biblioteca glob para listar as instâncias
+import json  # Importa a biblioteca json para guardar e comparar resultados
+import time  # Importa a biblioteca time para medir o tempo de execução
+import argparse  # Importa a biblioteca argparse para a linha de comandos
+import resource  # Importa a biblioteca resource para medir o pico de memória
+import tempfile  # Importa a biblioteca tempfile para a pasta das instâncias sintéticas
+import multiprocessing as mp  # Importa a biblioteca multiprocessing para isolar cada execução
+from Instance import read_data, cache_paths
+from Generator import write_cache_only
+from Budget import new_budget
+from Solver import ALGORITHMS, algorithm_parameters
+
+# Pasta com as instâncias de teste (ORLIB e Kratica)
+TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'FicheirosTeste')
+SUITES = {
+    'orlib': os.path.join(TEST_DIR, 'ORLIB', 'cap*.txt'),
+    'm': os.path.join(TEST_DIR, 'M', 'Kcap*.txt'),
+}
+
+# Nome da instância a partir do ficheiro (cap71.txt -> cap71, Kcapmo1.txt -> kcapmo1)
+def instance_name(filename):
+    return os.path.basename(filename).split('.')[0].lower()
+
+# Valores ótimos de referência: ficheiros .opt (último valor) e, na falta deles, optimal.txt
+def read_references():
+    references = {}
+    with open(os.path.join(TEST_DIR, 'optimal.txt'), encoding='latin-1') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) >= 2:
+                try:
+                    references[parts[0].lower()] = float(parts[1])
+                except ValueError:
+                    pass  # Linhas de título
+    for opt_file in glob.glob(os.path.join(TEST_DIR, '*', '*.opt')):
+        with open(opt_file) as file:
+            references[instance_name(opt_file)] = float(file.read().split()[-1])
+    return references
+
+# Lista de ficheiros das suites pedidas, pela ordem de optimal.txt
+def suite_files(suites, references):
+    order = {name: position for position, name in enumerate(references)}
+    files = []
+    for suite in suites:
+        suite_glob = sorted(glob.glob(SUITES[suite]))
+        files += sorted(suite_glob, key=lambda filename: order.get(instance_name(filename), len(order)))
+    return files
+
+# Executa uma corrida num processo novo (o pico de memória medido é só desta corrida)
+def _run_job(job):
+    filename, algorithm, seed, time_limit, max_evaluations = job
+    read_data(filename)  # A leitura da instância (cache) não conta para o tempo da pesquisa
+    budget = new_budget(time_limit, max_evaluations)
+    start_time = time.perf_counter()
+    _, cost = ALGORITHMS[algorithm](filename, seed, budget, 0, **algorithm_parameters(algorithm, budget, {}))
+    wall_time = time.perf_counter() - start_time
+    return {
+        'instance': instance_name(filename),
+        'algorithm': algorithm,
+        'seed': seed,
+        'cost': cost,
+        'wall_time': wall_time,
+        'evaluations': budget['evaluations'],
+        'evaluations_per_second': budget['evaluations'] / wall_time if wall_time > 0 else 0.0,
+        'peak_memory_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def run_benchmark(files, algorithms, seeds, time_limit=None, max_evaluations=None, verbose=True):
+    references = read_references()
+    context = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+    results = []
+    for filename in files:
+        for algorithm in algorithms:
+            for seed in seeds:
+                with context.Pool(1, maxtasksperchild=1) as pool:
+                    record = pool.apply(_run_job, ((filename, algorithm, seed, time_limit, max_evaluations),))
+                reference = references.get(record['instance'])
+                record['optimum'] = reference
+                record['gap'] = 100 * (record['cost'] - reference) / reference if reference else None
+                results.append(record)
+                if verbose:
+                    gap = f"{record['gap']:8.3f}%" if record['gap'] is not None else '       -'
+                    print(f"{record['instance']:8s} {algorithm:8s} seed={seed:<4d} custo={record['cost']:.5f} gap={gap} "
+                          f"tempo={record['wall_time']:.3f}s aval/s={record['evaluations_per_second']:.0f} "
+                          f"memória={record['peak_memory_mb']:.1f}MB")
+    return results
+
+# Guarda os resultados em CSV ou JSON conforme a extensão do ficheiro
+def write_results(results, filename):
+    if filename.endswith('.json'):
+        with open(filename, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+def read_results(filename):
+    if filename.endswith('.json'):
+        with open(filename) as file:
+            return json.load(file)
+    with open(filename, newline='') as file:
+        return [{**row, 'seed': int(row['seed']), 'evaluations_per_second': float(row['evaluations_per_second'])}
+                for row in csv.DictReader(file)]
+
+# Compara com uma execução de referência: regressão se as avaliações por segundo caírem mais do que a tolerância
+def compare_with_baseline(results, baseline, tolerance=0.1):
+    baseline = {(row['instance'], row['algorithm'], row['seed']): row for row in baseline}
+    regressions = []
+    for record in results:
+        previous = baseline.get((record['instance'], record['algorithm'], record['seed']))
+        if previous is None or not previous['evaluations_per_second']:
+            continue
+        ratio = record['evaluations_per_second'] / previous['evaluations_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append((record, ratio))
+            print(f"REGRESSÃO {record['instance']} {record['algorithm']} seed={record['seed']}: "
+                  f"{ratio:.2f}x as avaliações por segundo da referência")
+    return regressions
+
+# Instâncias sintéticas para o estudo de escalabilidade: sizes é uma lista de (n, m), geradas só na cache binária
+# (reaproveitadas se já existirem na pasta)
+def scaling_instances(sizes, directory, seed=0, structure='euclidean'):
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for num_customers, num_warehouses in sizes:
+        filename = os.path.join(directory, f"synth_{structure}_{num_customers}x{num_warehouses}_s{seed}.txt")
+        if not os.path.exists(cache_paths(filename)[0]):
+            write_cache_only(filename, num_warehouses, num_customers, seed=seed, structure=structure)
+        files.append(filename)
+    return files
+
+def run_scaling(sizes, algorithms, seeds, time_limit=None, max_evaluations=None, directory=None, structure='euclidean'):
+    directory = directory or os.path.join(tempfile.gettempdir(), 'aao-scaling')
+    files = scaling_instances(sizes, directory, structure=structure)
+    results = run_benchmark(files, algorithms, seeds, time_limit, max_evaluations)
+    dimensions = {instance_name(filename): size for filename, size in zip(files, sizes)}
+    for record in results:
+        record['customers'], record['warehouses'] = dimensions[record['instance']]
+    return results
+
+# Gráficos do tempo, memória e avaliações/s em função do tamanho n x m, uma linha por algoritmo
+# O matplotlib é opcional: sem ele os resultados continuam a ser guardados com --output
+def plot_scaling(results, filename):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib não está instalado: gráfico não gerado")
+        return False
+    metrics = [('wall_time', 'Tempo (s)'), ('peak_memory_mb', 'Pico de memória (MB)'),
+               ('evaluations_per_second', 'Avaliações / s')]
+    figure, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 4))
+    for axis, (metric, label) in zip(axes, metrics):
+        for algorithm in sorted({record['algorithm'] for record in results}):
+            points = {}
+            for record in results:
+                if record['algorithm'] == algorithm:
+                    points.setdefault(record['customers'] * record['warehouses'], []).append(record[metric])
+            sizes = sorted(points)
+            axis.plot(sizes, [sum(points[size]) / len(points[size]) for size in sizes], marker='o', label=algorithm)
+        axis.set_xscale('log')
+        axis.set_yscale('log')
+        axis.set_xlabel('n x m')
+        axis.set_ylabel(label)
+        axis.grid(True, which='both', alpha=0.3)
+    axes[0].legend()
+    figure.tight_layout()
+    figure.savefig(filename)
+    return True
+
+# Tamanho "NxM" da linha de comandos (clientes x armazéns)
+def parse_size(text):
+    num_customers, num_warehouses = text.lower().split('x')
+    return int(num_customers), int(num_warehouses)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos algoritmos nas instâncias ORLIB e Kratica")
+    parser.add_argument('--algorithms', nargs='+', default=['all'], choices=['all', *ALGORITHMS])
+    parser.add_argument('--suites', nargs='+', default=list(SUITES), choices=list(SUITES))
+    parser.add_argument('--instances', nargs='+', help="Só estas instâncias (ex.: cap71 kcapmo1)")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[42])
+    parser.add_argument('--time-limit', type=float, help="Limite de tempo por corrida (segundos)")
+    parser.add_argument('--max-evaluations', type=int, help="Limite de avaliações por corrida")
+    parser.add_argument('--output', help="Ficheiro de resultados (.csv ou .json)")
+    parser.add_argument('--baseline', help="Resultados anteriores (.csv ou .json) para detetar regressões")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Queda relativa tolerada nas avaliações/s")
+    # Estudo de escalabilidade com instâncias sintéticas (em vez das suites)
+    parser.add_argument('--scaling', nargs='+', type=parse_size, metavar='NxM',
+                        help="Tamanhos das instâncias sintéticas (clientes x armazéns), ex.: 1000x100 10000x2000")
+    parser.add_argument('--structure', choices=['euclidean', 'random'], default='euclidean')
+    parser.add_argument('--scaling-dir', help="Pasta das instâncias sintéticas (por omissão na pasta temporária)")
+    parser.add_argument('--plot', help="Gráfico do estudo de escalabilidade (.png/.pdf, precisa do matplotlib)")
+    args = parser.parse_args(argv)
+
+    algorithms = list(ALGORITHMS) if 'all' in args.algorithms else args.algorithms
+    if args.scaling:
+        results = run_scaling(args.scaling, algorithms, args.seeds, args.time_limit, args.max_evaluations,
+                              args.scaling_dir, args.structure)
+        if args.plot and results:
+            plot_scaling(results, args.plot)
+    else:
+        files = suite_files(args.suites, read_references())
+        if args.instances:
+            files = [filename for filename in files if instance_name(filename) in {name.lower() for name in args.instances}]
+        results = run_benchmark(files, algorithms, args.seeds, args.time_limit, args.max_evaluations)
+    if args.output and results:
+        write_results(results, args.output)
+    if args.baseline and compare_with_baseline(results, read_results(args.baseline), args.tolerance):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import time  # Importa a biblioteca time para o limite de tempo
+
+# Orçamento de uma execução: limite de tempo (segundos) e/ou de avaliações de custo
+# O próprio dicionário acumula as avaliações feitas pelo algoritmo (lidas depois pelo benchmark)
+# lower_bound (opcional, ver LowerBound.py) permite calcular o gap da melhor solução e parar quando for <= target_gap (%)
+# instrumentation (opcional, ver Instrumentation.py): contadores, tempos por fase e callback de progresso
+# stop (opcional): função sem argumentos que devolve True quando a execução deve parar (cancelamento externo)
+def new_budget(time_limit=None, max_evaluations=None, lower_bound=None, target_gap=None, instrumentation=None, stop=None):
+    return {
+        'start_time': time.time(),
+        'deadline': time.time() + time_limit if time_limit is not None else None,
+        'max_evaluations': max_evaluations,
+        'evaluations': 0,
+        'lower_bound': lower_bound,
+        'target_gap': target_gap,
+        'best_cost': float('inf'),
+        'instrumentation': instrumentation,
+        'stop': stop,
+    }
+
+# Gap (%) de um custo em relação ao limite inferior (None sem limite inferior)
+def optimality_gap(budget, cost):
+    if budget['lower_bound'] is None:
+        return None
+    return 100 * (cost - budget['lower_bound']) / abs(budget['lower_bound'])
+
+# Regista o custo de uma nova melhor solução do algoritmo e devolve o seu gap
+def record_incumbent(budget, cost):
+    budget['best_cost'] = min(budget['best_cost'], cost)
+    return optimality_gap(budget, cost)
+
+# Verifica se o orçamento foi esgotado (chamado uma vez por iteração/passagem, nunca por movimento)
+def budget_exhausted(budget):
+    if budget['max_evaluations'] is not None and budget['evaluations'] >= budget['max_evaluations']:
+        return True
+    if budget['target_gap'] is not None and budget['lower_bound'] is not None:
+        if optimality_gap(budget, budget['best_cost']) <= budget['target_gap']:
+            return True  # A melhor solução já está a menos de target_gap do ótimo
+    if budget['stop'] is not None and budget['stop']():
+        return True
+    return budget['deadline'] is not None and time.time() >= budget['deadline']
+
+# Verifica se o orçamento tem algum limite (caso contrário os algoritmos usam os seus critérios de paragem)
+def budget_limited(budget):
+    return budget['deadline'] is not None or budget['max_evaluations'] is not None
@@ -0,0 +1,32 @@
+import os  # Importa a biblioteca os para a escrita atómica do ficheiro
+import json  # Importa a biblioteca json para o estado dos geradores numpy (inteiros de 128 bits)
+import random  # Importa a biblioteca random para o estado do gerador do Python
+import numpy as np  # Importa a biblioteca numpy para o formato binário (.npz comprimido)
+
+# Guarda um ponto de retoma: vetores numpy e escalares num .npz comprimido, escrito de forma atómica
+# (ficheiro temporário + os.replace, como a cache das instâncias) para nunca deixar um ficheiro incompleto
+def save_checkpoint(path, **values):
+    tmp_path = path + '.tmp.npz'
+    np.savez_compressed(tmp_path, **values)
+    os.replace(tmp_path, path)
+
+# Lê um ponto de retoma (None se o ficheiro não existir)
+def load_checkpoint(path):
+    if path is None or not os.path.exists(path):
+        return None
+    with np.load(path) as checkpoint:
+        return {name: checkpoint[name] for name in checkpoint.files}
+
+# Estado do gerador random do Python (Mersenne Twister: 624 palavras e a posição)
+def python_random_state():
+    return np.array(random.getstate()[1], dtype=np.uint64)
+
+def set_python_random_state(state):
+    random.setstate((3, tuple(int(value) for value in state), None))
+
+# Estado de um numpy Generator (guardado como texto JSON por ter inteiros de 128 bits)
+def generator_state(rng):
+    return np.array(json.dumps(rng.bit_generator.state))
+
+def set_generator_state(rng, state):
+    rng.bit_generator.state = json.loads(str(state))
@@ -0,0 +1,286 @@
+import numpy as np  # Importa a biblioteca numpy para os vetores de estado
+from Instance import assignment_costs, customer_costs
+
+# Tolerância para considerar uma variação de custo como melhoria (evita ciclos por erros de arredondamento)
+EPSILON = 1e-6
+# Modo capacitado: fator de aumento da penalização num ótimo local inviável e aumento máximo em relação à inicial
+PENALTY_GROWTH = 10.0
+MAX_PENALTY_RATIO = 1e6
+# Oscilação estratégica da pesquisa tabu: a penalização sobe ou desce este fator a cada iteração
+PENALTY_OSCILLATION = 1.1
+
+# Todas as funções aceitam também os dados esparsos de Instance.read_sparse (movimentos fora dos arcos custam infinito)
+# No modo esparso a matriz de variações completa (all_move_deltas) não existe: usar as listas de candidatos data['arcs']
+# Aceitam também os dados capacitados de Instance.read_capacitated: o estado guarda a capacidade restante de cada armazém
+# e 'total' é o custo penalizado, custo + penalização x sobrecarga (procura acima da capacidade, somada nos armazéns).
+# As variações incluem a variação da sobrecarga, que só depende da capacidade restante da origem e do destino (O(1))
+
+# Custos dos candidatos de um cliente (ou de todos): no modo esparso os candidatos são um prefixo dos arcos
+def _candidate_costs(data, customers, warehouses):
+    if 'arcs' in data:
+        return data['costs'][customers, :warehouses.shape[-1]]
+    if np.ndim(customers) == 0:
+        return data['costs'][customers][warehouses]
+    return data['costs'][customers[:, None], warehouses]
+
+# Sobrecarga de armazéns com capacidade restante residual (0 se a capacidade chegar)
+def _overload(residual):
+    return np.maximum(-residual, 0.0)
+
+# Ao mover um cliente de procura d, a origem a perde min(sobrecarga de a, d) e o destino j ganha min(max(d - r[j], 0), d),
+# em que r é a capacidade restante: a variação da sobrecarga só depende de r[a] e r[j]
+# Penalização poupada pela origem de cada cliente (vetor por cliente, somado às poupanças de fecho)
+def _leaving_penalties(state, data, customers):
+    overloads = _overload(state['residual'][state['solution'][customers]])
+    return state['penalty'] * np.minimum(overloads, data['demands'][customers])
+
+# Penalização poupada pela origem do cliente i (escalar, O(1))
+def _leaving_penalty(state, data, customer_idx):
+    overload = max(-float(state['residual'][state['solution'][customer_idx]]), 0.0)
+    return state['penalty'] * min(overload, float(data['demands'][customer_idx]))
+
+# Penalização paga pelos destinos warehouses (forma de customers ou com uma dimensão a mais, vários destinos por cliente)
+def _arriving_penalties(state, data, customers, warehouses):
+    demands = state['penalty'] * data['demands'][customers]
+    residual = state['residual'][warehouses]
+    if np.ndim(warehouses) > np.ndim(customers):
+        demands = np.expand_dims(demands, -1)
+    excess = demands - state['penalty'] * residual
+    np.maximum(excess, 0.0, out=excess)
+    np.minimum(excess, demands, out=excess)
+    return excess
+
+# Cria o estado incremental de uma solução: alocação, número de clientes por armazém e custo total
+# No modo capacitado também a capacidade restante de cada armazém, a sobrecarga total e a penalização
+def new_state(solution, data):
+    fixed_costs = data['fixed_costs']
+    solution = np.array(solution, dtype=np.int64)  # Cópia da solução (alterada no próprio estado)
+    counts = np.bincount(solution, minlength=len(fixed_costs))  # Clientes alocados a cada armazém
+    total = assignment_costs(data, np.arange(len(solution)), solution).sum() + fixed_costs[counts > 0].sum()
+    state = {
+        'solution': solution,
+        'counts': counts,
+        'opening_costs': np.where(counts == 0, fixed_costs, 0.0),  # Custo fixo a pagar se o armazém for aberto
+        'total': float(total),
+    }
+    if 'capacities' in data:
+        state['residual'] = data['capacities'] - np.bincount(solution, weights=data['demands'], minlength=len(fixed_costs))
+        state['overload'] = float(_overload(state['residual']).sum())
+        state['penalty'] = data['penalty']
+        state['total'] += state['penalty'] * state['overload']
+    return state
+
+# Custo real da solução do estado: infinito se for inviável (sobrecarga), para nunca ser registada como a melhor
+def feasible_cost(state):
+    if state.get('overload', 0.0) > EPSILON:
+        return np.inf
+    return state['total'] - state.get('penalty', 0.0) * state.get('overload', 0.0)
+
+# Muda a penalização do estado, atualizando o custo penalizado em O(1)
+def set_penalty(state, penalty):
+    state['total'] += (penalty - state['penalty']) * state['overload']
+    state['penalty'] = penalty
+
+# Num ótimo local inviável aumenta a penalização para que a pesquisa continue em direção às soluções viáveis
+# Devolve True se a penalização foi aumentada (False sem capacidades, com a solução viável ou no máximo)
+def escalate_penalty(state, data):
+    if 'capacities' not in data or state['overload'] <= EPSILON:
+        return False
+    if state['penalty'] >= data['penalty'] * MAX_PENALTY_RATIO:
+        return False
+    set_penalty(state, state['penalty'] * PENALTY_GROWTH)
+    return True
+
+# Oscilação estratégica (pesquisa tabu): a penalização sobe enquanto a solução é inviável e desce, até à inicial,
+# enquanto é viável, para a pesquisa atravessar a fronteira da capacidade em vez de ficar presa de um dos lados
+def oscillate_penalty(state, data):
+    if 'capacities' not in data:
+        return
+    if state['overload'] > EPSILON:
+        set_penalty(state, min(state['penalty'] * PENALTY_OSCILLATION, data['penalty'] * MAX_PENALTY_RATIO))
+    else:
+        set_penalty(state, max(state['penalty'] / PENALTY_OSCILLATION, data['penalty']))
+
+# Variação exata do custo ao mover o cliente i para o armazém j, em O(1)
+def move_delta(state, data, customer_idx, warehouse_idx):
+    current_idx = state['solution'][customer_idx]
+    if warehouse_idx == current_idx:
+        return 0.0
+    costs = assignment_costs(data, [customer_idx, customer_idx], [warehouse_idx, current_idx])
+    delta = costs[0] - costs[1] + state['opening_costs'][warehouse_idx]
+    if 'capacities' in data:
+        demand = float(data['demands'][customer_idx])
+        arriving = min(max(demand - float(state['residual'][warehouse_idx]), 0.0), demand)
+        delta += state['penalty'] * arriving - _leaving_penalty(state, data, customer_idx)
+    if state['counts'][current_idx] == 1:
+        delta -= data['fixed_costs'][current_idx]  # O armazém atual fica vazio e é fechado
+    return float(delta)
+
+# Variações do custo ao mover o cliente i para cada um dos m armazéns (O(m) numa só operação numpy)
+# A posição do armazém atual fica com infinito para nunca ser escolhida como movimento
+def customer_deltas(state, data, customer_idx):
+    current_idx = state['solution'][customer_idx]
+    costs = customer_costs(data, customer_idx)
+    if 'capacities' in data:
+        deltas = costs - (costs[current_idx] + _leaving_penalty(state, data, customer_idx)) + state['opening_costs']
+        # Só os armazéns sem capacidade restante para a procura do cliente recebem penalização
+        demand, residual = data['demands'][customer_idx], state['residual']
+        tight = np.flatnonzero(residual < demand)
+        if len(tight):
+            deltas[tight] += state['penalty'] * np.minimum(demand - residual[tight], demand)
+    else:
+        deltas = costs - costs[current_idx] + state['opening_costs']
+    if state['counts'][current_idx] == 1:
+        deltas -= data['fixed_costs'][current_idx]
+    deltas[current_idx] = np.inf
+    return deltas
+
+# Variações do custo ao mover o cliente i apenas para os seus armazéns candidatos (O(k) em vez de O(m))
+# Os candidatos que são o armazém atual ficam com infinito
+def candidate_deltas(state, data, customer_idx, candidates):
+    current_idx = state['solution'][customer_idx]
+    warehouses = candidates[customer_idx]
+    current_cost = assignment_costs(data, [customer_idx], [current_idx])[0]
+    if 'capacities' in data:
+        current_cost += _leaving_penalty(state, data, customer_idx)
+    deltas = _candidate_costs(data, customer_idx, warehouses) - current_cost + state['opening_costs'][warehouses]
+    if 'capacities' in data:
+        deltas += _arriving_penalties(state, data, customer_idx, warehouses)
+    if state['counts'][current_idx] == 1:
+        deltas -= data['fixed_costs'][current_idx]
+    deltas[warehouses == current_idx] = np.inf
+    return deltas
+
+# Variações do custo de vários movimentos alternativos (cliente customers[t] -> armazém warehouses[t]) numa só operação
+# Cada variação é calculada sobre o estado atual, como se só esse movimento fosse aplicado
+def move_deltas(state, data, customers, warehouses):
+    current = state['solution'][customers]
+    deltas = (assignment_costs(data, customers, warehouses) - assignment_costs(data, customers, current)
+              + state['opening_costs'][warehouses])
+    if 'capacities' in data:
+        deltas += _arriving_penalties(state, data, customers, warehouses) - _leaving_penalties(state, data, customers)
+    deltas -= np.where(state['counts'][current] == 1, data['fixed_costs'][current], 0.0)
+    deltas[warehouses == current] = 0.0
+    return deltas
+
+# Aplica o movimento no próprio estado (sem copiar a solução) e devolve a variação do custo
+def apply_move(state, data, customer_idx, warehouse_idx):
+    solution, counts, opening_costs = state['solution'], state['counts'], state['opening_costs']
+    current_idx = solution[customer_idx]
+    if warehouse_idx == current_idx:
+        return 0.0
+    delta = move_delta(state, data, customer_idx, warehouse_idx)
+
+    counts[current_idx] -= 1
+    if counts[current_idx] == 0:
+        opening_costs[current_idx] = data['fixed_costs'][current_idx]  # Armazém fechado
+    if counts[warehouse_idx] == 0:
+        opening_costs[warehouse_idx] = 0.0  # Armazém aberto
+    counts[warehouse_idx] += 1
+
+    if 'capacities' in data:
+        # Só a origem e o destino mudam de capacidade restante: a sobrecarga total é atualizada em O(1)
+        residual, demand = state['residual'], float(data['demands'][customer_idx])
+        overload = max(-residual[current_idx], 0.0) + max(-residual[warehouse_idx], 0.0)
+        residual[current_idx] += demand
+        residual[warehouse_idx] -= demand
+        state['overload'] += max(-residual[current_idx], 0.0) + max(-residual[warehouse_idx], 0.0) - overload
+
+    solution[customer_idx] = warehouse_idx
+    state['total'] += delta
+    return delta
+
+# Matriz n x m com a variação do custo de todos os movimentos (cliente i -> armazém j) numa só passagem numpy
+# Inclui o custo fixo de abrir o armazém de destino e a poupança de fechar o armazém de origem
+def all_move_deltas(state, data):
+    if 'arcs' in data:
+        raise ValueError("all_move_deltas precisa da matriz de custos densa (no modo esparso usar os arcos)")
+    solution, counts = state['solution'], state['counts']
+    customers = np.arange(len(solution))
+    costs = data['costs']
+    current_costs = costs[customers, solution]
+    closing_savings = np.where(counts[solution] == 1, data['fixed_costs'][solution], 0.0)
+    if 'capacities' in data:
+        closing_savings += _leaving_penalties(state, data, customers)
+    deltas = costs - (current_costs + closing_savings)[:, None]
+    deltas += state['opening_costs']
+    if 'capacities' in data:
+        # Só as colunas dos armazéns sem folga para o maior cliente (em geral poucos: os abertos quase cheios)
+        tight = np.flatnonzero(state['residual'] < data['demands'].max())
+        if len(tight):
+            deltas[:, tight] += _arriving_penalties(state, data, customers, tight[None, :])
+    deltas[customers, solution] = np.inf  # O armazém atual não é um movimento
+    return deltas
+
+# Matriz n x k com a variação do custo dos movimentos de cada cliente para os seus k armazéns candidatos
+def all_candidate_deltas(state, data, candidates):
+    solution, counts = state['solution'], state['counts']
+    customers = np.arange(len(solution))
+    current_costs = assignment_costs(data, customers, solution)
+    closing_savings = np.where(counts[solution] == 1, data['fixed_costs'][solution], 0.0)
+    if 'capacities' in data:
+        closing_savings += _leaving_penalties(state, data, customers)
+    deltas = _candidate_costs(data, customers, candidates) - (current_costs + closing_savings)[:, None]
+    deltas += state['opening_costs'][candidates]
+    if 'capacities' in data:
+        # Só os candidatos que são armazéns sem folga para o maior cliente
+        rows, positions = np.nonzero((state['residual'] < data['demands'].max())[candidates])
+        if len(rows):
+            deltas[rows, positions] += _arriving_penalties(state, data, rows, candidates[rows, positions])
+    deltas[candidates == solution[:, None]] = np.inf  # O armazém atual não é um movimento
+    return deltas
+
+# Melhor movimento que melhora a solução numa passagem pela vizinhança; devolve (movimento ou None, avaliações)
+# Com listas de candidatos procura primeiro só nos candidatos (O(n·k)) e, se nenhum melhorar, recorre à
+# vizinhança completa (O(n·m)) para que o ótimo local final seja o mesmo que sem candidatos
+# No modo esparso, com candidatos que cobrem todos os arcos, a vizinhança completa são os próprios candidatos
+def best_improving_move(state, data, candidates=None):
+    evaluations = 0
+    if candidates is not None:
+        deltas = all_candidate_deltas(state, data, candidates)
+        evaluations += deltas.size
+        customer_idx, position = divmod(int(deltas.argmin()), deltas.shape[1])
+        if deltas[customer_idx, position] < -EPSILON:
+            return (customer_idx, int(candidates[customer_idx, position])), evaluations
+        if 'arcs' in data and candidates.shape[1] == data['arcs'].shape[1]:
+            return None, evaluations
+
+    if 'arcs' not in data:
+        # Vizinhança completa numa só passagem numpy (a matriz densa existe; muito mais rápido do que cliente a cliente)
+        deltas = all_move_deltas(state, data)
+        customer_idx, warehouse_idx = divmod(int(deltas.argmin()), deltas.shape[1])
+        best_move = (customer_idx, warehouse_idx) if deltas[customer_idx, warehouse_idx] < -EPSILON else None
+        return best_move, evaluations + deltas.size
+
+    # Modo esparso sem a matriz completa: cliente a cliente
+    best_delta = -EPSILON
+    best_move = None
+    for customer_idx in range(len(data['costs'])):
+        deltas = customer_deltas(state, data, customer_idx)
+        new_warehouse_idx = int(deltas.argmin())
+        if deltas[new_warehouse_idx] < best_delta:
+            best_delta = deltas[new_warehouse_idx]
+            best_move = (customer_idx, new_warehouse_idx)
+    return best_move, evaluations + data['costs'].size
+
+# Custo de toda a população de uma vez (matriz pop_size x n de índices de armazém)
+# Custos de alocação por indexação avançada e custos fixos pela máscara de armazéns abertos de cada linha
+# No modo capacitado soma a penalização (fixa, data['penalty']) da sobrecarga de cada linha
+def population_costs(population, data):
+    pop_size, num_customers = population.shape
+    allocation_costs = data['costs'][np.arange(num_customers), population].sum(axis=1)
+    opened = np.zeros((pop_size, len(data['fixed_costs'])), dtype=bool)
+    opened[np.arange(pop_size)[:, None], population] = True
+    total_costs = allocation_costs + opened @ data['fixed_costs']
+    if 'capacities' in data:
+        total_costs += data['penalty'] * population_overloads(population, data)
+    return total_costs
+
+# Sobrecarga de cada linha da população: cargas pop_size x m com um só bincount sobre os índices (linha, armazém)
+def population_overloads(population, data):
+    pop_size, num_customers = population.shape
+    num_warehouses = len(data['fixed_costs'])
+    cells = (np.arange(pop_size)[:, None] * num_warehouses + population).ravel()
+    weights = np.broadcast_to(data['demands'], population.shape).ravel()
+    loads = np.bincount(cells, weights=weights, minlength=pop_size * num_warehouses).reshape(pop_size, num_warehouses)
+    return _overload(data['capacities'] - loads).sum(axis=1)
@@ -0,0 +1,119 @@
+import numpy as np  # Importa a biblioteca numpy para os vetores de estado
+
+# Vizinhança ao nível dos armazéns: abrir um armazém, fechar um armazém ou trocar um aberto por um fechado
+# Sem capacidades cada cliente fica sempre no armazém aberto mais barato, por isso o estado guarda para cada cliente
+# o melhor e o segundo melhor armazém aberto: fechar o melhor só envia o cliente para o segundo
+
+# Melhor e segundo melhor armazém aberto para um conjunto de clientes (linhas da matriz de custos)
+# Com um só armazém aberto o segundo é -1 com custo infinito
+def _nearest_open(rows, open_indices):
+    sub = np.asarray(rows)[:, open_indices]
+    if len(open_indices) == 1:
+        best = np.full(len(sub), open_indices[0])
+        return best, np.full(len(sub), -1), sub[:, 0].copy(), np.full(len(sub), np.inf)
+    nearest = np.argpartition(sub, 1, axis=1)[:, :2]
+    nearest_costs = np.take_along_axis(sub, nearest, axis=1)
+    swap = nearest_costs[:, 1] < nearest_costs[:, 0]
+    nearest[swap] = nearest[swap, ::-1]
+    nearest_costs[swap] = nearest_costs[swap, ::-1]
+    return open_indices[nearest[:, 0]], open_indices[nearest[:, 1]], nearest_costs[:, 0], nearest_costs[:, 1]
+
+# Cria o estado da vizinhança de armazéns: abertos os armazéns usados pela solução, cada cliente no mais barato
+# 'solution' e 'total' têm o mesmo significado que no estado de Evaluation.new_state
+def new_facility_state(solution, data):
+    if 'arcs' in data:
+        raise ValueError("Os movimentos de armazém precisam da matriz de custos densa (não funcionam no modo esparso)")
+    if 'capacities' in data:
+        raise ValueError("Os movimentos de armazém supõem cada cliente no armazém aberto mais barato (sem capacidades)")
+    is_open = np.zeros(len(data['fixed_costs']), dtype=bool)
+    is_open[np.asarray(solution)] = True
+    best, second, best_costs, second_costs = _nearest_open(data['costs'], np.flatnonzero(is_open))
+    return {
+        'open': is_open,
+        'solution': best,
+        'second': second,
+        'best_costs': best_costs,
+        'second_costs': second_costs,
+        'total': float(best_costs.sum() + data['fixed_costs'][is_open].sum()),
+    }
+
+# Variação do custo de todos os movimentos de armazém, calculada a partir do melhor/segundo melhor de cada cliente:
+# - abrir j (fechado): custo fixo de j mais a poupança dos clientes para quem j fica mais barato
+# - fechar j (aberto): os clientes de j passam para o segundo melhor, menos o custo fixo de j
+# - trocar (fechar j_out, abrir j_in): como abrir j_in, mas os clientes de j_out comparam j_in com o segundo melhor
+# Devolve (abrir[m], fechar[m], trocar[m x m] indexado por [j_out, j_in]) com infinito nos movimentos inválidos
+def facility_move_deltas(state, data):
+    costs, fixed_costs = data['costs'], data['fixed_costs']
+    is_open, best = state['open'], state['solution']
+    best_costs, second_costs = state['best_costs'], state['second_costs']
+    open_indices, closed_indices = np.flatnonzero(is_open), np.flatnonzero(~is_open)
+    num_warehouses = len(fixed_costs)
+
+    closed_costs = np.asarray(costs[:, closed_indices]) if len(closed_indices) else np.empty((len(best), 0))
+    opening_savings = np.minimum(closed_costs - best_costs[:, None], 0.0).sum(axis=0)
+    open_deltas = np.full(num_warehouses, np.inf)
+    open_deltas[closed_indices] = fixed_costs[closed_indices] + opening_savings
+
+    # Com um só armazém aberto second_costs é infinito e fechá-lo fica inválido
+    close_deltas = np.bincount(best, weights=second_costs - best_costs, minlength=num_warehouses) - fixed_costs
+    close_deltas[~is_open] = np.inf
+
+    # Correção da troca para os clientes de j_out: agregada por armazém com uma matriz de pertença (n x abertos)
+    extra = np.minimum(closed_costs, second_costs[:, None]) - np.minimum(closed_costs, best_costs[:, None])
+    members = (best[:, None] == open_indices[None, :]).astype(np.float64)
+    swap_deltas = np.full((num_warehouses, num_warehouses), np.inf)
+    swap_deltas[np.ix_(open_indices, closed_indices)] = (
+        (fixed_costs[closed_indices] + opening_savings)[None, :] - fixed_costs[open_indices][:, None] + members.T @ extra)
+    return open_deltas, close_deltas, swap_deltas
+
+# Melhor movimento de armazém (fechar, abrir) e a sua variação; None num dos lados quando é só abrir ou só fechar
+# tabu (opcional): vetor booleano dos armazéns que não podem mudar, salvo se a variação for menor que aspiration_delta
+# Devolve (movimento ou None, variação, avaliações)
+def best_facility_move(state, data, tabu=None, aspiration_delta=-np.inf):
+    open_deltas, close_deltas, swap_deltas = facility_move_deltas(state, data)
+    num_open = int(state['open'].sum())
+    evaluations = len(open_deltas) + num_open * (len(open_deltas) - num_open)
+    if tabu is not None:
+        open_deltas[tabu & (open_deltas >= aspiration_delta)] = np.inf
+        close_deltas[tabu & (close_deltas >= aspiration_delta)] = np.inf
+        swap_deltas[(tabu[:, None] | tabu[None, :]) & (swap_deltas >= aspiration_delta)] = np.inf
+
+    candidates = [(None, int(open_deltas.argmin())), (int(close_deltas.argmin()), None),
+                  divmod(int(swap_deltas.argmin()), swap_deltas.shape[1])]
+    deltas = [open_deltas[candidates[0][1]], close_deltas[candidates[1][0]], swap_deltas[candidates[2]]]
+    position = int(np.argmin(deltas))
+    if not np.isfinite(deltas[position]):
+        return None, np.inf, evaluations
+    return candidates[position], float(deltas[position]), evaluations
+
+# Aplica o movimento no próprio estado e devolve a variação do custo
+# Abrir só compara o novo armazém com o melhor/segundo de cada cliente; fechar recalcula apenas os clientes
+# que tinham o armazém fechado como melhor ou segundo melhor. O custo total soma só as variações desses clientes
+# e do custo fixo (como Evaluation.apply_move)
+def apply_facility_move(state, data, close_idx=None, open_idx=None):
+    is_open, best, second = state['open'], state['solution'], state['second']
+    best_costs, second_costs = state['best_costs'], state['second_costs']
+    delta = 0.0
+
+    if open_idx is not None:  # Abre primeiro para que haja sempre pelo menos um armazém aberto
+        is_open[open_idx] = True
+        column = np.asarray(data['costs'][:, open_idx])
+        better = column < best_costs
+        second[better], second_costs[better] = best[better], best_costs[better]
+        best[better], best_costs[better] = open_idx, column[better]
+        middle = ~better & (column < second_costs)
+        second[middle], second_costs[middle] = open_idx, column[middle]
+        delta += data['fixed_costs'][open_idx] + float((column[better] - second_costs[better]).sum())
+
+    if close_idx is not None:
+        is_open[close_idx] = False
+        affected = np.flatnonzero((best == close_idx) | (second == close_idx))
+        delta -= data['fixed_costs'][close_idx]
+        if len(affected):
+            old_costs = best_costs[affected]
+            best[affected], second[affected], best_costs[affected], second_costs[affected] = _nearest_open(
+                data['costs'][affected], np.flatnonzero(is_open))
+            delta += float((best_costs[affected] - old_costs).sum())
+
+    state['total'] += float(delta)
+    return float(delta)
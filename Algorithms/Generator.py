@@ -0,0 +1,103 @@
+import sys  # Importa a biblioteca sys para o código de saída
+import argparse  # Importa a biblioteca argparse para a linha de comandos
+import numpy as np  # Importa a biblioteca numpy para gerar os custos por blocos
+from Instance import cache_paths, finish_cache
+
+# Clientes gerados de cada vez (limita a memória: um bloco tem BLOCK_SIZE x m custos)
+BLOCK_SIZE = 1024
+
+# Custos fixos dos m armazéns: 'uniform' no intervalo fixed_cost_range, 'constant' (o mínimo do intervalo)
+# ou 'lognormal' com mediana no centro do intervalo
+def generate_fixed_costs(num_warehouses, rng, distribution='uniform', fixed_cost_range=(5000.0, 20000.0)):
+    low, high = fixed_cost_range
+    if distribution == 'uniform':
+        return np.round(rng.uniform(low, high, num_warehouses), 3)
+    if distribution == 'constant':
+        return np.full(num_warehouses, float(low))
+    if distribution == 'lognormal':
+        return np.round(rng.lognormal(np.log((low + high) / 2), 0.5, num_warehouses), 3)
+    raise ValueError(f"Distribuição de custos fixos desconhecida: {distribution}")
+
+# Gera a instância por blocos de clientes: devolve os custos fixos e um gerador de blocos (procuras, custos)
+# 'euclidean': armazéns e clientes em pontos aleatórios do quadrado unitário, custo = procura x distância x cost_scale
+# 'random': custo unitário uniforme em [0, 1) x procura x cost_scale, sem estrutura geométrica
+def generate_instance(num_warehouses, num_customers, seed=0, structure='euclidean', fixed_cost_distribution='uniform',
+                      fixed_cost_range=(5000.0, 20000.0), cost_scale=1000.0):
+    rng = np.random.default_rng(seed)
+    fixed_costs = generate_fixed_costs(num_warehouses, rng, fixed_cost_distribution, fixed_cost_range)
+    if structure not in ('euclidean', 'random'):
+        raise ValueError(f"Estrutura de custos desconhecida: {structure}")
+    warehouse_points = rng.random((num_warehouses, 2))
+
+    def blocks():
+        for start in range(0, num_customers, BLOCK_SIZE):
+            size = min(BLOCK_SIZE, num_customers - start)
+            demands = rng.integers(1, 100, size).astype(np.float64)
+            if structure == 'euclidean':
+                points = rng.random((size, 2))
+                unit_costs = np.sqrt(((points[:, None, :] - warehouse_points[None, :, :]) ** 2).sum(axis=2))
+            else:
+                unit_costs = rng.random((size, num_warehouses))
+            yield demands, np.round(demands[:, None] * unit_costs * cost_scale, 5)
+
+    return fixed_costs, blocks()
+
+# Escreve a instância no formato ORLIB lido por Instance.read_data: "m n", m linhas "capacidade custo_fixo"
+# e, para cada cliente, a procura seguida dos m custos de alocação (7 por linha, como nos ficheiros da ORLIB)
+# A capacidade de cada armazém é maior do que a procura total (instância sem capacidades efetivas)
+def write_orlib(filename, num_warehouses, num_customers, **options):
+    fixed_costs, blocks = generate_instance(num_warehouses, num_customers, **options)
+    capacity = 100 * num_customers
+    with open(filename, 'w') as file:
+        file.write(f" {num_warehouses} {num_customers} \n")
+        for fixed_cost in fixed_costs:
+            file.write(f" {capacity} {fixed_cost:.3f} \n")
+        for demands, costs in blocks:
+            lines = []
+            for demand, row in zip(demands, costs):
+                lines.append(f" {int(demand)} \n")
+                values = [f"{value:.5f}" for value in row.tolist()]
+                for start in range(0, len(values), 7):
+                    lines.append(" " + " ".join(values[start:start + 7]) + " \n")
+            file.write("".join(lines))
+
+# Escreve a instância diretamente na cache binária (<ficheiro>.costs.npy e <ficheiro>.meta.npz), sem texto
+# read_data(filename) usa a cache mesmo sem existir o ficheiro de texto (ver Instance._cache_is_valid)
+def write_cache_only(filename, num_warehouses, num_customers, **options):
+    fixed_costs, blocks = generate_instance(num_warehouses, num_customers, **options)
+    costs_path, _ = cache_paths(filename)
+    tmp_costs = costs_path + '.tmp.npy'
+    costs = np.lib.format.open_memmap(tmp_costs, mode='w+', dtype=np.float64, shape=(num_customers, num_warehouses))
+    demands = np.empty(num_customers)
+    row = 0
+    for block_demands, block in blocks:
+        costs[row:row + len(block)] = block
+        demands[row:row + len(block)] = block_demands
+        row += len(block)
+    costs.flush()
+    del costs
+    capacities = np.full(num_warehouses, 100.0 * num_customers)  # As mesmas do formato ORLIB (write_orlib)
+    finish_cache(filename, fixed_costs, tmp_costs, 0, capacities, demands)  # source_mtime 0: não há ficheiro de texto de origem
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera instâncias sintéticas no formato ORLIB ou diretamente na cache")
+    parser.add_argument('filename', help="Ficheiro da instância (com --cache-only só são escritos os ficheiros da cache)")
+    parser.add_argument('-m', '--warehouses', type=int, required=True)
+    parser.add_argument('-n', '--customers', type=int, required=True)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--structure', choices=['euclidean', 'random'], default='euclidean')
+    parser.add_argument('--fixed-costs', choices=['uniform', 'constant', 'lognormal'], default='uniform')
+    parser.add_argument('--fixed-cost-range', type=float, nargs=2, default=[5000.0, 20000.0])
+    parser.add_argument('--cache-only', action='store_true', help="Escreve só a cache binária (instâncias muito grandes)")
+    args = parser.parse_args(argv)
+
+    options = {'seed': args.seed, 'structure': args.structure, 'fixed_cost_distribution': args.fixed_costs,
+               'fixed_cost_range': tuple(args.fixed_cost_range)}
+    if args.cache_only:
+        write_cache_only(args.filename, args.warehouses, args.customers, **options)
+    else:
+        write_orlib(args.filename, args.warehouses, args.customers, **options)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
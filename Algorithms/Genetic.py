@@ -1,136 +1,393 @@
-import random  # Importa a biblioteca random para gerar números aleatórios
 import time  # Importa a biblioteca time para medir o tempo de execução
+from collections import OrderedDict  # Importa OrderedDict para a cache LRU das fitnesses
+import multiprocessing as mp  # Importa a biblioteca multiprocessing para o modelo de ilhas
+import multiprocessing.connection  # Espera pelo fim das ilhas (mp.connection.wait)
+import numpy as np  # Importa a biblioteca numpy para representar a população como uma matriz
+from Instance import read_data  # Leitura dos dados partilhada
+from Evaluation import EPSILON, population_costs, population_overloads  # Avaliação de toda a população de uma vez
+from Budget import new_budget, budget_exhausted, record_incumbent, optimality_gap  # Orçamento de tempo/avaliações
+from Instrumentation import count, phase, report_progress  # Contadores e tempos por fase (opcionais)
+from Checkpoint import save_checkpoint, load_checkpoint, generator_state, set_generator_state  # Pontos de retoma
 
-def read_data(filename):
-    # Abre o ficheiro e lê todas as linhas
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-
-    # Lê a primeira linha para obter o número de armazéns (m) e clientes (n)
-    m, n = map(int, lines[0].split())
-    data = {'warehouses': [], 'customers': []}
-
-    # Lê os dados dos armazéns (ignorando a capacidade)
-    for i in range(1, m + 1):
-        parts = lines[i].split()  # Divide a linha em partes
-        fixed_cost = float(parts[1])  # Obtém o custo fixo do armazém
-        data['warehouses'].append({'fixed_cost': fixed_cost, 'opened': False})  # Adiciona o armazém à lista
-
-    line_index = m + 1  # Define o índice da linha atual
-    while line_index < len(lines):
-        # Avança uma linha, ignorando a demanda do cliente
-        line_index += 1
-
-        # Lê os custos de transporte dos clientes para os armazéns
-        costs = []  # Inicializa a lista de custos
-        while line_index < len(lines) and not lines[line_index].strip().isdigit():
-            costs.extend(lines[line_index].strip().split())  # Adiciona os custos à lista
-            line_index += 1  # Avança para a próxima linha
-
-        # Adiciona os custos de transporte do cliente à lista de clientes
-        data['customers'].append({'costs': [float(cost) for cost in costs]})
-
-    return data  # Retorna os dados lidos
-
-def fitness(solution, data):
-    total_cost = 0  # Inicializa o custo total
-    warehouse_usage = [False] * len(data['warehouses'])  # Inicializa a utilização dos armazéns
-
-    for i, customer in enumerate(data['customers']):
-        warehouse_idx = solution[i]  # Obtém o índice do armazém para o cliente
-        if warehouse_idx >= len(data['warehouses']):
-            return float('inf')  # Solução inválida
-        warehouse = data['warehouses'][warehouse_idx]
-        
-        # Adiciona o custo fixo do armazém se ele ainda não foi aberto
-        if not warehouse_usage[warehouse_idx]:
-            total_cost += warehouse['fixed_cost']
-            warehouse_usage[warehouse_idx] = True
-        
-        # Adiciona o custo de transporte do cliente para o armazém
-        total_cost += customer['costs'][warehouse_idx]
-
-    return total_cost  # Retorna o custo total
-
-def initialize_population(data, pop_size):
-    population = []  # Inicializa a população
-    num_warehouses = len(data['warehouses'])  # Obtém o número de armazéns
-    # Gera uma solução aleatória para cada cliente
-    for _ in range(pop_size):
-        solution = [random.randint(0, num_warehouses - 1) for _ in range(len(data['customers']))]  # Solução aleatória
-        population.append(solution)  # Adiciona a solução à população
+def initialize_population(data, pop_size, rng):
+    num_warehouses = len(data['fixed_costs'])  # Obtém o número de armazéns
+    # Gera uma solução aleatória para cada cliente: a população é uma matriz pop_size x n
+    return rng.integers(0, num_warehouses, size=(pop_size, len(data['costs'])))  # Retorna a população
+
+# Probabilidade de seleção de cada indivíduo (roleta sobre 1 / custo)
+def selection_probabilities(costs):
+    fitnesses = 1 / (costs + 1e-9)  # Calcula a fitness a partir do custo
+    return fitnesses / fitnesses.sum()  # Normaliza as fitnesses
+
+# Índice do melhor indivíduo viável com custo menor do que best_cost, ou None (sem capacidades: o de menor custo)
+# No modo capacitado os custos são penalizados, por isso só se verifica a sobrecarga dos que batem best_cost
+def best_feasible(population, costs, data, best_cost):
+    better = np.flatnonzero(costs < best_cost)
+    if 'capacities' in data and len(better):
+        better = better[population_overloads(population[better], data) <= EPSILON]
+    if not len(better):
+        return None
+    return int(better[costs[better].argmin()])
+
+# Hash de Zobrist das soluções: o hash é o XOR das chaves de 64 bits de cada gene (cliente i no armazém j)
+# A chave de (i, j) é uma mistura multiplicativa de i·m + j em vez de uma tabela n x m, que ocuparia tanto como os custos
+# Cada indivíduo da população tem os prefixos do XOR (linha de prefixes com o XOR dos genes 0..c-1 na coluna c e o hash
+# na última): o hash de um filho do crossover de um ponto sai de três prefixos dos pais, mais uma correção por gene
+# mutado, sem percorrer a solução. Só os filhos que entram na população têm os seus prefixos calculados, numa linha
+# livre do buffer (os indivíduos que ficam mantêm a sua linha: nada é copiado a cada geração)
+# customers pode ser um vetor de n clientes para uma matriz de soluções (broadcast por linha); operações no próprio
+# array para não criar uma matriz temporária por passo
+def gene_keys(customers, warehouses, num_warehouses):
+    keys = warehouses.astype(np.uint64)
+    keys += customers.astype(np.uint64) * np.uint64(num_warehouses) + np.uint64(1)
+    shifted = np.empty_like(keys)
+    keys *= np.uint64(0x9E3779B97F4A7C15)
+    keys ^= np.right_shift(keys, np.uint64(32), out=shifted)
+    keys *= np.uint64(0xD6E8FEB86659FD93)
+    keys ^= np.right_shift(keys, np.uint64(32), out=shifted)
+    return keys
+
+# Prefixos completos do hash de cada linha, matriz pop_size x (n + 1)
+def solution_prefixes(population, num_warehouses):
+    prefixes = np.empty((len(population), population.shape[1] + 1), dtype=np.uint64)
+    prefixes[:, 0] = 0
+    keys = gene_keys(np.arange(population.shape[1]), population, num_warehouses)
+    np.bitwise_xor.accumulate(keys, axis=1, out=prefixes[:, 1:])
+    return prefixes
+
+# Hashes da população: buffer de prefixos, linha do buffer de cada indivíduo ('slots') e hash de cada indivíduo
+def new_hashing(population, num_warehouses):
+    prefixes = solution_prefixes(population, num_warehouses)
+    return {'prefixes': prefixes, 'slots': np.arange(len(population)), 'hashes': prefixes[:, -1].copy()}
+
+# Hashes dos filhos em O(1 + genes mutados) cada: genes 0..ponto-1 do pai base e os restantes do outro pai
+# (bases/others são índices na população), corrigidos com as chaves antiga e nova de cada gene mutado
+def child_hashes(children, hashing, bases, others, points, mutated, old_genes, num_warehouses):
+    prefixes, slots = hashing['prefixes'], hashing['slots']
+    bases, others = slots[bases], slots[others]
+    hashes = prefixes[bases, points] ^ prefixes[others, -1] ^ prefixes[others, points]
+    if len(mutated):
+        rows, customers = np.divmod(mutated, children.shape[1])
+        changes = (gene_keys(customers, old_genes, num_warehouses)
+                   ^ gene_keys(customers, children.ravel()[mutated], num_warehouses))
+        np.bitwise_xor.at(hashes, rows, changes)
+    return hashes
+
+# Depois da substituição: os indivíduos que já estavam na população (mesmo hash) mantêm a sua linha do buffer e os
+# filhos que entraram ocupam as linhas livres, com os prefixos calculados só para eles
+def update_hashing(hashing, population, hashes, num_warehouses):
+    known = dict(zip(hashing['hashes'].tolist(), hashing['slots'].tolist()))
+    slots = np.array([known.get(key, -1) for key in hashes.tolist()], dtype=np.int64)
+    new = np.flatnonzero(slots < 0)
+    if len(new):
+        used = np.zeros(len(hashing['prefixes']), dtype=bool)
+        used[slots[slots >= 0]] = True
+        free = np.flatnonzero(~used)[:len(new)]
+        hashing['prefixes'][free] = solution_prefixes(population[new], num_warehouses)
+        slots[new] = free
+    hashing['slots'], hashing['hashes'] = slots, hashes
+
+# Cache LRU limitada das fitnesses, indexada pelo hash da solução (max_size entradas)
+# 'evaluations' conta as avaliações reais e 'hits' as que foram evitadas (uma colisão de 64 bits é desprezável)
+def new_fitness_cache(max_size=10000):
+    return {'entries': OrderedDict(), 'max_size': max_size, 'evaluations': 0, 'hits': 0}
+
+# Custos dos indivíduos com a cache: só os hashes desconhecidos (uma vez cada) são avaliados com population_costs
+def cached_costs(cache, population, hashes, data):
+    entries = cache['entries']
+    keys = hashes.tolist()
+    found = [entries.get(key) for key in keys]
+    missing = {}  # Hash -> primeiro índice a avaliar
+    for index, (key, cost) in enumerate(zip(keys, found)):
+        if cost is None:
+            missing.setdefault(key, index)
+        else:
+            entries.move_to_end(key)
+    if missing:
+        indices = np.fromiter(missing.values(), dtype=np.int64, count=len(missing))
+        rows = population if len(indices) == len(population) else population[indices]  # Sem cópia se nenhum acertou
+        fresh = dict(zip(missing, population_costs(rows, data).tolist()))
+        found = [fresh[key] if cost is None else cost for key, cost in zip(keys, found)]
+        entries.update(fresh)
+        while len(entries) > cache['max_size']:
+            entries.popitem(last=False)  # Remove a entrada usada há mais tempo
+    cache['evaluations'] += len(missing)
+    cache['hits'] += len(population) - len(missing)
+    return np.array(found)
+
+# Devolve os filhos e, para cada filho, os índices do pai de onde vem a primeira parte e do outro pai e o ponto de
+# corte (para o hash incremental)
+def crossover(parents, num_children, rng):
+    num_pairs = (num_children + 1) // 2  # Cada par de pais gera dois filhos
+    # Seleciona dois pais distintos para cada par
+    first = rng.integers(0, len(parents), size=num_pairs)
+    second = (first + rng.integers(1, len(parents), size=num_pairs)) % len(parents)
+    parent1, parent2 = parents[first], parents[second]
+    
+    num_customers = parents.shape[1]
+    points = rng.integers(1, num_customers - 1, size=num_pairs)  # Escolhe um ponto de corte aleatório por par
+    before_point = np.arange(num_customers) < points[:, None]
+    child1 = np.where(before_point, parent1, parent2)  # Gera o primeiro filho
+    child2 = np.where(before_point, parent2, parent1)  # Gera o segundo filho
+    children = np.stack((child1, child2), axis=1).reshape(-1, num_customers)[:num_children]
+    bases = np.stack((first, second), axis=1).reshape(-1)[:num_children]
+    others = np.stack((second, first), axis=1).reshape(-1)[:num_children]
+    return children, bases, others, np.repeat(points, 2)[:num_children]  # Retorna os filhos
+
+# Devolve as posições mutadas (na matriz achatada) e os genes que lá estavam antes da mutação
+def mutate(population, mutation_rate, num_warehouses, rng):
+    mutated = rng.random(population.shape) < mutation_rate  # Verifica em que genes ocorre a mutação
+    positions = np.flatnonzero(mutated)
+    old_genes = population.ravel()[positions]
+    population[mutated] = rng.integers(0, num_warehouses, size=len(positions))  # Realiza a mutação
+    return positions, old_genes
+
+# hashes (opcional): hashes dos indivíduos, que acompanham a substituição; com unique=True os duplicados (mesmo hash)
+# só entram na população se não houver indivíduos distintos suficientes
+def replace_population(population, costs, new_individuals, new_costs, hashes=None, new_hashes=None, unique=False):
+    combined_population = np.concatenate((population, new_individuals))  # Combina a população antiga com os novos indivíduos
+    combined_costs = np.concatenate((costs, new_costs))  # Os custos já calculados acompanham cada indivíduo
+    order = np.argsort(combined_costs, kind='stable')  # Ordena pelo custo
+    if hashes is None:
+        order = order[:len(population)]
+        return combined_population[order], combined_costs[order], None  # Retorna a nova população e os seus custos
+    combined_hashes = np.concatenate((hashes, new_hashes))
+    if unique:
+        first = np.zeros(len(order), dtype=bool)
+        first[np.unique(combined_hashes[order], return_index=True)[1]] = True  # Primeira ocorrência (a mais barata)
+        order = np.concatenate((order[first], order[~first]))
+    order = order[:len(population)]
+    return combined_population[order], combined_costs[order], combined_hashes[order]
+
+# Uma geração do algoritmo: seleção, crossover, mutação, avaliação e substituição
+# budget (opcional): recebe o tempo de cada operador e o número de avaliações de fitness (ver Instrumentation.py)
+# hashing e cache (opcionais): hashes de Zobrist da população (ver new_hashing, atualizado na própria geração) e cache
+# LRU das fitnesses (ver new_fitness_cache); unique=True rejeita os duplicados na substituição. Devolve (população, custos)
+def evolve_generation(population, costs, data, mutation_rate, rng, budget=None, hashing=None, cache=None, unique=False):
+    pop_size = len(population)
+    num_warehouses = len(data['fixed_costs'])
+    # Selecionar os melhores indivíduos para serem usados pelos operadores genéticos
+    with phase(budget, 'selection'):
+        selected = rng.choice(pop_size, size=pop_size // 2, p=selection_probabilities(costs))
+        parents = population[selected]
+    
+    # Gerar novos indivíduos usando crossover e mutação
+    with phase(budget, 'crossover'):
+        next_population, bases, others, points = crossover(parents, pop_size, rng)
+    with phase(budget, 'mutation'):
+        mutated, old_genes = mutate(next_population, mutation_rate, num_warehouses, rng)
+
+    # 4. Avaliar a fitness dos novos indivíduos (com a cache, só os que ainda não foram avaliados)
+    with phase(budget, 'evaluation'):
+        if hashing is None:
+            next_hashes = None
+            new_costs = population_costs(next_population, data)
+            evaluations = pop_size
+        else:
+            next_hashes = child_hashes(next_population, hashing, selected[bases], selected[others], points, mutated,
+                                       old_genes, num_warehouses)
+            if cache is not None:
+                before = cache['evaluations']
+                new_costs = cached_costs(cache, next_population, next_hashes, data)
+                evaluations = cache['evaluations'] - before
+            else:
+                new_costs = population_costs(next_population, data)
+                evaluations = pop_size
+    count(budget, 'fitness_calls', evaluations)
+    count(budget, 'cache_hits', pop_size - evaluations)
     
-    return population  # Retorna a população
-
-def select_parents(population, fitnesses, num_parents):
-    total_fitness = sum(fitnesses)  # Calcula o custo total
-    normalized_fitnesses = [f / total_fitness for f in fitnesses]  # Normaliza as fitnesses
-    selected_indices = random.choices(range(len(population)), weights=normalized_fitnesses, k=num_parents)  # Seleciona os índices dos pais
-    return [population[i] for i in selected_indices]  # Retorna os pais selecionados
-
-def crossover(parent1, parent2):
-    point = random.randint(1, len(parent1) - 2)  # Escolhe um ponto de corte aleatório
-    child1 = parent1[:point] + parent2[point:]  # Gera o primeiro filho
-    child2 = parent2[:point] + parent1[point:]  # Gera o segundo filho
-    return child1, child2  # Retorna os filhos
-
-def mutate(solution, mutation_rate, num_warehouses):
-    for i in range(len(solution)):
-        if random.random() < mutation_rate:  # Verifica se ocorre a mutação
-            solution[i] = random.randint(0, num_warehouses - 1)  # Realiza a mutação
-
-def replace_population(population, new_individuals, data):
-    combined_population = population + new_individuals  # Combina a população antiga com os novos indivíduos
-    combined_population.sort(key=lambda sol: fitness(sol, data))  # Ordena pela fitness
-    return combined_population[:len(population)]  # Retorna a nova população
-
-def genetic_algorithm(data, pop_size=100, generations=1000, mutation_rate=0.01):
+    # Substituir os piores indivíduos da população pelos melhores novos indivíduos
+    with phase(budget, 'replacement'):
+        hashes = hashing['hashes'] if hashing is not None else None
+        population, costs, hashes = replace_population(population, costs, next_population, new_costs, hashes,
+                                                       next_hashes, unique)
+        if hashing is not None:
+            update_hashing(hashing, population, hashes, num_warehouses)
+    return population, costs
+
+# checkpoint (opcional): ficheiro onde a população, a melhor solução e o estado do gerador são guardados a cada
+# checkpoint_interval gerações e no fim; com resume=True a execução continua a partir desse ficheiro (se existir),
+# com resultados iguais aos de uma execução sem interrupção (generations pode ser aumentado para continuar a pesquisa)
+# cache_size: entradas da cache LRU das fitnesses (0 desliga a cache); unique=True rejeita indivíduos duplicados
+# Com a cache só as avaliações reais contam no orçamento. A cache compensa quando a fitness é cara em relação ao hash
+# e há muitos clones (população convergida, n·mutation_rate pequeno); nas instâncias ORLIB/Kratica acerta poucas vezes
+# e custa mais do que poupa, por isso está desligada por omissão. As soluções e os custos são os mesmos sem ela
+# No modo capacitado (Instance.read_capacitated) a fitness é o custo penalizado pela sobrecarga e a melhor solução é a
+# melhor viável (custo infinito se nenhum indivíduo for viável)
+def genetic_algorithm(data, pop_size=100, generations=1000, mutation_rate=0.01, seed=None, budget=None, verbosity=2,
+                      checkpoint=None, checkpoint_interval=100, resume=False, cache_size=0, unique=False):
+    if 'arcs' in data:
+        raise ValueError("O algoritmo genético precisa da matriz de custos densa (não funciona no modo esparso)")
     start_time = time.time()  # Marca o tempo de início
+    rng = np.random.default_rng(seed)  # Gerador de números aleatórios do algoritmo
+    budget = budget if budget is not None else new_budget()  # Orçamento de tempo/avaliações (ilimitado por omissão)
+    saved = load_checkpoint(checkpoint) if resume else None
     
-    # 1. Escolher uma população inicial aleatória de indivíduos
-    population = initialize_population(data, pop_size)
-    best_solution = None  # Inicializa a melhor solução
-    best_fitness = float('inf')  # Inicializa a melhor fitness
+    if saved is not None:
+        # Retoma: população, custos e gerador exatamente como estavam no fim da geração guardada
+        population, costs = saved['population'], saved['costs']
+        best_solution, best_fitness = saved['best_solution'], float(saved['best_cost'])
+        set_generator_state(rng, saved['rng_state'])
+        first_generation = int(saved['generation'])
+        budget['evaluations'] += int(saved['evaluations'])
+    else:
+        # 1. Escolher uma população inicial aleatória de indivíduos
+        population = initialize_population(data, pop_size, rng)
+        # 2. Avaliar a fitness dos indivíduos (uma única vez por indivíduo)
+        costs = population_costs(population, data)
+        budget['evaluations'] += pop_size
+        count(budget, 'fitness_calls', pop_size)
+        best_index = best_feasible(population, costs, data, np.inf)
+        if best_index is None:
+            best_index, best_fitness = int(costs.argmin()), np.inf  # Nenhum indivíduo viável (modo capacitado)
+        else:
+            best_fitness = float(costs[best_index])  # Inicializa a melhor fitness
+        best_solution = population[best_index].copy()  # Inicializa a melhor solução
+        first_generation = 0
+    record_incumbent(budget, best_fitness)
+    cache = new_fitness_cache(cache_size) if cache_size else None
+    hashing = new_hashing(population, len(data['fixed_costs'])) if cache is not None or unique else None
+    if cache is not None:
+        cache['entries'].update(zip(hashing['hashes'].tolist(), costs.tolist()))  # A população inicial já está avaliada
     
-    for generation in range(generations):
-        # 2. Avaliar a fitness dos indivíduos
-        fitnesses = [1 / (fitness(solution, data) + 1e-9) for solution in population]  # Calcula a fitness
-        
-        # 3. Repetir:
-        # Selecionar os melhores indivíduos para serem usados pelos operadores genéticos
-        parents = select_parents(population, fitnesses, pop_size // 2)
-        
-        next_population = []  # Inicializa a próxima população
-        while len(next_population) < pop_size:
-            parent1, parent2 = random.sample(parents, 2)  # Seleciona dois pais
-            # Gerar novos indivíduos usando crossover e mutação
-            child1, child2 = crossover(parent1, parent2)  # Realiza o crossover
-            mutate(child1, mutation_rate, len(data['warehouses']))  # Realiza a mutação no primeiro filho
-            mutate(child2, mutation_rate, len(data['warehouses']))  # Realiza a mutação no segundo filho
-            next_population.append(child1)  # Adiciona o primeiro filho à próxima população
-            if len(next_population) < pop_size:
-                next_population.append(child2)  # Adiciona o segundo filho à próxima população
-
-        # 4. Avaliar a fitness dos novos indivíduos
-        new_fitnesses = [fitness(solution, data) for solution in next_population]  # Calcula a fitness dos novos indivíduos
-        
-        # Substituir os piores indivíduos da população pelos melhores novos indivíduos
-        population = replace_population(population, next_population, data)
+    completed = first_generation  # Gerações já feitas (a guardar no ponto de retoma)
+    for generation in range(first_generation, generations):
+        if budget_exhausted(budget):
+            break  # Orçamento esgotado: devolve a melhor solução encontrada até agora
+        # 3. Repetir: gerar a próxima geração
+        evaluations = cache['evaluations'] if cache is not None else 0
+        population, costs = evolve_generation(population, costs, data, mutation_rate, rng, budget, hashing, cache,
+                                              unique)
+        budget['evaluations'] += cache['evaluations'] - evaluations if cache is not None else pop_size
+
+        # Atualizar a melhor solução encontrada (a população fica ordenada pelo custo)
+        best_index = best_feasible(population, costs, data, best_fitness) if costs[0] < best_fitness else None
+        if best_index is not None:
+            best_fitness = float(costs[best_index])  # Atualiza a melhor fitness
+            best_solution = population[best_index].copy()  # Atualiza a melhor solução
+            record_incumbent(budget, best_fitness)
+            count(budget, 'improvements')
+        report_progress(budget, generation=generation + 1)
 
-        # Atualizar a melhor solução encontrada
-        for solution in population:
-            current_fitness = fitness(solution, data)
-            if current_fitness < best_fitness:
-                best_fitness = current_fitness  # Atualiza a melhor fitness
-                best_solution = solution  # Atualiza a melhor solução
+        if verbosity >= 1 and generation % 100 == 0:
+            gap = optimality_gap(budget, best_fitness)
+            gap_text = f", Gap = {gap:.3f}%" if gap is not None else ""
+            print(f"Geração {generation}: Melhor Custo = {best_fitness:.5f}{gap_text}")  # Imprime a melhor fitness a cada 100 gerações
 
-        if generation % 100 == 0:
-            print(f"Geração {generation}: Melhor Custo = {best_fitness:.5f}")  # Imprime a melhor fitness a cada 100 gerações
+        completed = generation + 1
+        if checkpoint is not None and completed % checkpoint_interval == 0:
+            save_checkpoint(checkpoint, population=population, costs=costs, best_solution=best_solution,
+                            best_cost=best_fitness, rng_state=generator_state(rng), generation=completed,
+                            evaluations=budget['evaluations'])
+
+    if checkpoint is not None:
+        save_checkpoint(checkpoint, population=population, costs=costs, best_solution=best_solution,
+                        best_cost=best_fitness, rng_state=generator_state(rng), generation=completed,
+                        evaluations=budget['evaluations'])
 
     end_time = time.time()  # Marca o tempo de fim
     execution_time = end_time - start_time  # Calcula o tempo de execução
     
-    return best_solution, best_fitness, execution_time  # Retorna a melhor solução, fitness e tempo de execução
+    return best_solution.tolist(), best_fitness, execution_time  # Retorna a melhor solução, fitness e tempo de execução
+
+# Ilhas de onde cada ilha recebe migrantes: em anel recebe da anterior, totalmente ligada recebe de todas as outras
+def migration_sources(island, num_islands, topology):
+    if topology == 'ring':
+        return [(island - 1) % num_islands] if num_islands > 1 else []
+    if topology == 'full':
+        return [other for other in range(num_islands) if other != island]
+    raise ValueError(f"Topologia desconhecida: {topology}")
+
+# Processo de uma ilha: evolui a sua população e troca os melhores indivíduos pelos buffers de memória partilhada
+def _island_worker(filename, island, num_islands, seed, pop_size, generations, mutation_rate,
+                   migration_interval, num_migrants, topology, buffers, barrier):
+    data = read_data(filename)  # Matriz de custos memory-mapped, partilhada entre processos
+    num_customers = len(data['costs'])
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(island,)))  # Semente própria da ilha
+    outboxes = np.frombuffer(buffers['migrants'], dtype=np.int32).reshape(num_islands, num_migrants, num_customers)
+    outbox_costs = np.frombuffer(buffers['migrant_costs']).reshape(num_islands, num_migrants)
+    sources = migration_sources(island, num_islands, topology)
+
+    population = initialize_population(data, pop_size, rng)
+    costs = population_costs(population, data)
+    order = np.argsort(costs, kind='stable')  # Os melhores indivíduos ficam no início da população
+    population, costs = population[order], costs[order]
+    for generation in range(1, generations + 1):
+        population, costs = evolve_generation(population, costs, data, mutation_rate, rng)
+        
+        # Migração síncrona: todas as ilhas escrevem os seus melhores e só depois leem os dos vizinhos
+        if sources and generation % migration_interval == 0 and generation < generations:
+            outboxes[island] = population[:num_migrants]
+            outbox_costs[island] = costs[:num_migrants]
+            barrier.wait()
+            migrants = np.concatenate([outboxes[source] for source in sources])
+            migrant_costs = np.concatenate([outbox_costs[source] for source in sources])
+            barrier.wait()  # Nenhuma ilha reescreve o seu buffer antes de todas terem lido
+            # Os migrantes substituem os piores indivíduos da população
+            population, costs, _ = replace_population(population, costs, migrants, migrant_costs)
+
+    # A população está ordenada pelo custo: o primeiro indivíduo é o melhor da ilha
+    np.frombuffer(buffers['best_solutions'], dtype=np.int32).reshape(num_islands, num_customers)[island] = population[0]
+    np.frombuffer(buffers['best_costs'])[island] = costs[0]
+
+# Modelo de ilhas: num_islands populações evoluem em processos separados e trocam os melhores indivíduos
+# a cada migration_interval gerações, numa topologia em anel ('ring') ou totalmente ligada ('full')
+def island_genetic_algorithm(filename, num_islands=4, pop_size=100, generations=1000, mutation_rate=0.01,
+                             migration_interval=50, num_migrants=2, topology='ring', seed=None):
+    start_time = time.time()  # Marca o tempo de início
+    num_customers = len(read_data(filename)['costs'])  # Garante que a cache binária existe antes de criar os processos
+    num_migrants = min(num_migrants, pop_size)
+    seed = np.random.SeedSequence(seed).entropy  # Semente principal comum a todas as ilhas
+    migration_sources(0, num_islands, topology)  # Valida a topologia antes de criar os processos
+    
+    context = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+    buffers = {
+        'migrants': context.RawArray('i', num_islands * num_migrants * num_customers),
+        'migrant_costs': context.RawArray('d', num_islands * num_migrants),
+        'best_solutions': context.RawArray('i', num_islands * num_customers),
+        'best_costs': context.RawArray('d', num_islands),
+    }
+    barrier = context.Barrier(num_islands)
+    islands = [context.Process(target=_island_worker,
+                               args=(filename, island, num_islands, seed, pop_size, generations, mutation_rate,
+                                     migration_interval, num_migrants, topology, buffers, barrier))
+               for island in range(num_islands)]
+    for process in islands:
+        process.start()
+    
+    # Se uma ilha falhar, as outras não podem ficar bloqueadas na barreira
+    # Espera (sem ocupar o processador) até alguma das ilhas ainda vivas terminar e verifica então os códigos de saída
+    running = [process.sentinel for process in islands if process.is_alive()]
+    while running:
+        mp.connection.wait(running, timeout=1.0)
+        if any(process.exitcode not in (None, 0) for process in islands):
+            barrier.abort()
+            for process in islands:
+                process.terminate()
+            raise RuntimeError("Uma das ilhas do algoritmo genético terminou com erro")
+        running = [process.sentinel for process in islands if process.is_alive()]
+    if any(process.exitcode != 0 for process in islands):
+        raise RuntimeError("Uma das ilhas do algoritmo genético terminou com erro")
+    
+    best_costs = np.frombuffer(buffers['best_costs'])
+    best_island = int(best_costs.argmin())
+    best_solution = np.frombuffer(buffers['best_solutions'], dtype=np.int32).reshape(num_islands, num_customers)[best_island]
+    execution_time = time.time() - start_time  # Calcula o tempo de execução
+    
+    return best_solution.tolist(), float(best_costs[best_island]), execution_time
+
+# Compara o modelo de ilhas para vários números de ilhas: tempo, aceleração e qualidade da solução
+# A aceleração mede o número de gerações processadas por segundo em relação a uma só ilha
+def island_scaling_report(filename, island_counts=(1, 2, 4, 8), **parameters):
+    report = []
+    for num_islands in island_counts:
+        _, best_fitness, execution_time = island_genetic_algorithm(filename, num_islands, **parameters)
+        if not report:
+            base_time, base_islands = execution_time, num_islands
+        speedup = (num_islands / base_islands) * base_time / execution_time
+        report.append({'islands': num_islands, 'time': execution_time, 'speedup': speedup, 'cost': best_fitness})
+        print(f"Ilhas: {num_islands:3d}  Tempo: {execution_time:9.3f} s  Aceleração: {speedup:6.2f}  Custo: {best_fitness:.5f}")
+    return report
 
 def format_output(best_solution, total_value):
     output = " ".join(map(str, best_solution)) + " "  # Formata a solução
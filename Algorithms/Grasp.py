@@ -1,136 +1,315 @@
 import time  # Importa a biblioteca time para medir o tempo de execução
 import random  # Importa a biblioteca random para gerar números aleatórios
+import os  # Importa a biblioteca os para obter o número de processadores
+import multiprocessing as mp  # Importa a biblioteca multiprocessing para o GRASP paralelo
+import numpy as np  # Importa a biblioteca numpy para as sementes e soluções compactas
+from Instance import read_data, read_sparse, read_capacitated, candidate_lists, customer_costs  # Leitura dos dados e listas de candidatos partilhadas
+from Evaluation import new_state, best_improving_move, apply_move, move_deltas, feasible_cost, escalate_penalty  # Avaliação incremental dos movimentos
+from Budget import new_budget, budget_exhausted, record_incumbent  # Orçamento de tempo/avaliações
+from Instrumentation import count, phase, report_progress  # Contadores e tempos por fase (opcionais)
+from Checkpoint import save_checkpoint, load_checkpoint  # Pontos de retoma
 
-def read_data(filename):
-    print(f"Lendo dados do arquivo: {filename}")  # Exibe uma mensagem indicando a leitura do arquivo
-    with open(filename, 'r') as file:
-        lines = file.readlines()  # Lê todas as linhas do arquivo
-
-    # Extrair o número de armazéns (m) e clientes (n)
-    m, n = map(int, lines[0].split())
-    data = {'warehouses': [], 'customers': []}  # Inicializa o dicionário para armazenar os dados
-
-    # Leitura dos armazéns
-    for i in range(1, m + 1):
-        parts = lines[i].split()  # Divide a linha em partes
-        fixed_cost = float(parts[1])  # Extrai o custo fixo do armazém
-        data['warehouses'].append({'fixed_cost': fixed_cost, 'opened': False})  # Adiciona o armazém à lista
-
-    line_index = m + 1  # Define o índice da linha atual
-    while line_index < len(lines):
-        # Leitura do número do cliente (ignorada, pois não é necessária)
-        customer_number = int(lines[line_index].strip())  # Extrai o número do cliente
-        line_index += 1  # Avança para a próxima linha
-
-        # Leitura dos custos de alocação do cliente para cada armazém
-        costs = []  # Inicializa a lista de custos
-        while line_index < len(lines) and not lines[line_index].strip().isdigit():
-            costs.extend(map(float, lines[line_index].strip().split()))  # Adiciona os custos à lista
-            line_index += 1  # Avança para a próxima linha
-
-        # Adicionar o cliente à lista com os custos combinados
-        data['customers'].append({'costs': costs})  # Adiciona o cliente com seus custos
-
-    print("Leitura dos dados concluída.")  # Exibe uma mensagem indicando que a leitura dos dados foi concluída
-    return data  # Retorna os dados lidos
-
-def calculate_total_cost(solution, warehouses, customers):
-    total_cost = 0  # Inicializa o custo total
-    warehouse_used = [False] * len(warehouses)  # Lista para rastrear se o armazém foi usado
-    
-    for customer_idx, warehouse_idx in enumerate(solution):
-        warehouse = warehouses[warehouse_idx]
-        customer = customers[customer_idx]
-        
-        # Adiciona o custo fixo do armazém se for a primeira vez que o armazém é usado
-        if not warehouse_used[warehouse_idx]:
-            total_cost += warehouse['fixed_cost']
-            warehouse_used[warehouse_idx] = True
-        
-        # Adiciona o custo variável do cliente para o armazém atual
-        total_cost += customer['costs'][warehouse_idx]
-    
-    return total_cost  # Retorna o custo total
+# Semente própria de cada iteração, derivada da semente principal (independente do processo que a executa)
+# stream distingue sequências independentes na mesma iteração (0 é a da construção)
+def iteration_seed(seed, iteration, stream=0):
+    spawn_key = (iteration, stream) if stream else (iteration,)
+    return int(np.random.SeedSequence(seed, spawn_key=spawn_key).generate_state(1)[0])
 
-def greedy_randomized_construction(data, seed):
-    random.seed(seed)  # Define a seed para gerar números aleatórios
-    warehouses = data['warehouses']
-    customers = data['customers']
-    solution = [-1] * len(customers)  # Inicializa a solução com -1 para cada cliente
+# candidate_lists (opcional): só considera os k armazéns mais baratos de cada cliente e os armazéns já abertos
+# No modo capacitado só entram na lista os armazéns com capacidade restante para a procura do cliente; se nenhum
+# tiver, entram todos os armazéns com capacidade e, em último caso, todos (a busca local penalizada corrige a sobrecarga)
+def greedy_randomized_construction(data, seed, candidate_lists=None):
+    rng = random.Random(seed)  # Gerador de números aleatórios desta construção
+    fixed_costs = data['fixed_costs'].tolist()
+    costs = data['costs']
+    opened = [False] * len(fixed_costs)  # Lista para rastrear os armazéns abertos
+    opened_list = []  # Armazéns abertos (também candidatos de todos os clientes)
+    solution = [-1] * len(costs)  # Inicializa a solução com -1 para cada cliente
+    residual = data['capacities'].tolist() if 'capacities' in data else None  # Capacidade restante de cada armazém
     
-    for customer_idx, customer in enumerate(customers):
-        candidates = []  # Inicializa a lista de candidatos
+    for customer_idx in range(len(costs)):
+        allocation_costs = customer_costs(data, customer_idx)  # Custos de alocação do cliente (infinito fora dos arcos no modo esparso)
+        if candidate_lists is None:
+            warehouses = range(len(fixed_costs))
+        else:
+            warehouses = set(candidate_lists[customer_idx].tolist()).union(opened_list)
+        demand = float(data['demands'][customer_idx]) if residual is not None else 0.0
         
-        for warehouse_idx, warehouse in enumerate(warehouses):
-            cost = warehouse['fixed_cost'] if not warehouse['opened'] else 0
-            cost += customer['costs'][warehouse_idx]
-            candidates.append((cost, warehouse_idx))  # Adiciona o custo e o índice do armazém à lista de candidatos
+        all_warehouses = range(len(fixed_costs))
+        for pool, check_capacity in ((warehouses, True), (all_warehouses, True), (all_warehouses, False)):
+            candidates = []  # Inicializa a lista de candidatos
+            for warehouse_idx in pool:
+                if allocation_costs[warehouse_idx] == np.inf:
+                    continue  # Sem arco entre o cliente e o armazém (modo esparso)
+                if check_capacity and residual is not None and residual[warehouse_idx] < demand:
+                    continue  # Sem capacidade restante para o cliente (modo capacitado)
+                cost = fixed_costs[warehouse_idx] if not opened[warehouse_idx] else 0
+                cost += float(allocation_costs[warehouse_idx])
+                candidates.append((cost, warehouse_idx))  # Adiciona o custo e o índice do armazém à lista de candidatos
+            if candidates or residual is None:
+                break
         
         candidates.sort()  # Ordena os candidatos pelo custo
         
         alpha = 0.1  # Parâmetro de aleatoriedade
-        rcl_size = max(1, int(alpha * len(candidates)))  # Define o tamanho da lista restrita de candidatos (RCL)
-        selected = random.choice(candidates[:rcl_size])  # Seleciona aleatoriamente um candidato da RCL
+        rcl_size = max(1, int(alpha * len(fixed_costs)))  # Define o tamanho da lista restrita de candidatos (RCL)
+        selected = rng.choice(candidates[:rcl_size])  # Seleciona aleatoriamente um candidato da RCL
         
         selected_warehouse = selected[1]
         solution[customer_idx] = selected_warehouse  # Atualiza a solução com o armazém selecionado
+        if residual is not None:
+            residual[selected_warehouse] -= demand
         
-        if not warehouses[selected_warehouse]['opened']:
-            warehouses[selected_warehouse]['opened'] = True  # Marca o armazém como aberto
+        if not opened[selected_warehouse]:
+            opened[selected_warehouse] = True  # Marca o armazém como aberto
+            opened_list.append(selected_warehouse)
     
     return solution  # Retorna a solução
 
-def local_search(initial_solution, warehouses, customers):
-    current_solution = initial_solution[:]  # Copia a solução inicial
-    best_solution = current_solution[:]  # Define a melhor solução como a solução inicial
-    best_cost = calculate_total_cost(best_solution, warehouses, customers)  # Calcula o custo da melhor solução
-    print(f"Inicializando busca local. Custo inicial: {best_cost:.5f}")  # Exibe o custo inicial
+# candidate_lists (opcional): procura primeiro só nos armazéns candidatos de cada cliente
+# No modo capacitado, num ótimo local inviável aumenta a penalização e continua; devolve a melhor solução viável
+# (custo infinito se não encontrar nenhuma)
+def local_search(initial_solution, data, verbosity=2, budget=None, candidate_lists=None):
+    state = new_state(initial_solution, data)  # Estado incremental da solução (custo de cada vizinho em O(1))
+    best_cost = feasible_cost(state)  # Custo da solução inicial
+    best_solution = None  # Melhor solução viável quando já não é a do estado (só no modo capacitado)
+    budget = budget if budget is not None else new_budget()  # Orçamento de tempo/avaliações (ilimitado por omissão)
+    if verbosity >= 1:
+        print(f"Inicializando busca local. Custo inicial: {best_cost:.5f}")  # Exibe o custo inicial
     
     iteration = 0  # Inicializa o contador de iterações
-    while True:
-        found_better = False  # Inicializa a variável para procurar se uma melhor solução foi encontrada
-        for customer_idx in range(len(customers)):
-            current_warehouse_idx = current_solution[customer_idx]
-            
-            for new_warehouse_idx in range(len(warehouses)):
-                if new_warehouse_idx != current_warehouse_idx:
-                    new_solution = current_solution[:]  # Copia a solução atual
-                    new_solution[customer_idx] = new_warehouse_idx  # Altera a alocação do cliente para o novo armazém
-                    
-                    new_cost = calculate_total_cost(new_solution, warehouses, customers)  # Calcula o custo da nova solução
-                    
-                    if new_cost < best_cost:
-                        best_solution = new_solution[:]  # Atualiza a melhor solução
-                        best_cost = new_cost  # Atualiza o melhor custo
-                        found_better = True  # Marca que uma melhor solução foi encontrada
-                        print(f"Iteração {iteration}: Encontrada melhor solução com custo {best_cost:.5f}")  # Exibe a nova melhor solução
+    while not budget_exhausted(budget):
+        best_move, evaluations = best_improving_move(state, data, candidate_lists)  # Melhor movimento (cliente, armazém) desta passagem
+        budget['evaluations'] += evaluations  # Conta as avaliações de movimentos
         
-        if not found_better:
+        if best_move is None:
+            if escalate_penalty(state, data):
+                continue  # Ótimo local inviável: continua com uma penalização maior
             break  # Interrompe a busca se nenhuma melhor solução for encontrada
-        else:
-            current_solution = best_solution[:]  # Atualiza a solução atual com a melhor solução encontrada
+        
+        customer_idx, old_warehouse_idx = best_move[0], state['solution'][best_move[0]]
+        apply_move(state, data, *best_move)  # Aplica o melhor movimento na própria solução
+        count(budget, 'moves')
+        cost = feasible_cost(state)
+        if cost >= best_cost:
+            if best_solution is None and best_cost < np.inf:  # Saiu da melhor solução viável: guarda-a
+                best_solution = state['solution'].copy()
+                best_solution[customer_idx] = old_warehouse_idx
+            continue
+        best_cost, best_solution = cost, None  # Atualiza o melhor custo
+        gap = record_incumbent(budget, best_cost)  # Gap em relação ao limite inferior (se conhecido)
+        report_progress(budget)  # Cada melhoria da busca local chega ao callback de progresso (sem esperar pela iteração)
+        if verbosity >= 1:
+            gap_text = f" (gap {gap:.3f}%)" if gap is not None else ""
+            print(f"Iteração {iteration}: Encontrada melhor solução com custo {best_cost:.5f}{gap_text}")  # Exibe a nova melhor solução
         
         iteration += 1  # Incrementa o contador de iterações
     
-    print("Busca local concluída.")  # Exibe uma mensagem indicando que a busca local foi concluída
-    return best_solution, best_cost  # Retorna a melhor solução e seu custo
+    if verbosity >= 1:
+        print("Busca local concluída.")  # Exibe uma mensagem indicando que a busca local foi concluída
+    solution = state['solution'] if best_solution is None else best_solution
+    return solution.tolist(), best_cost  # Retorna a melhor solução e seu custo
+
+# Distância de Hamming entre duas soluções: número de clientes afetados a armazéns diferentes
+def hamming_distance(solution, other):
+    return int(np.count_nonzero(solution != other))
+
+# Conjunto de elite: lista de (custo, solução) com no máximo max_size soluções diferentes entre si
+# Uma solução entra se for melhor do que todas as do conjunto, ou se (com o conjunto cheio) for melhor do que a pior
+# e estiver a pelo menos min_distance de todas; com o conjunto cheio substitui a pior. Devolve True se entrou
+def update_elite(elite, solution, cost, max_size, min_distance):
+    if max_size <= 0:
+        return False
+    distances = [hamming_distance(solution, member) for _, member in elite]
+    if distances and min(distances) == 0:
+        return False  # Já está no conjunto
+    is_best = not elite or cost < min(member_cost for member_cost, _ in elite)
+    if not is_best and (min(distances) < min_distance or (len(elite) >= max_size and cost >= elite[-1][0])):
+        return False
+    if len(elite) >= max_size:
+        elite.pop()  # Remove a pior (o conjunto está ordenado pelo custo)
+    elite.append((cost, solution.copy()))
+    elite.sort(key=lambda member: member[0])
+    return True
 
-def grasp(filename, max_iterations, seed):
-    data = read_data(filename)  # Lê os dados do arquivo
+# Religação de caminhos: parte de solution e em cada passo aplica, entre os clientes que ainda diferem do guia,
+# o movimento para o armazém do guia com menor variação do custo (avaliação incremental sobre o estado)
+# A melhor solução intermédia do caminho (sem os extremos) é melhorada pela busca local
+# Devolve (solução, custo) ou (None, inf) se as soluções forem demasiado próximas para haver intermédias
+def path_relinking(solution, guide, data, budget, candidate_lists=None):
+    state = new_state(solution, data)
+    guide = np.asarray(guide)
+    remaining = np.flatnonzero(state['solution'] != guide)  # Clientes ainda por mudar
+    best_cost, best_solution = float('inf'), None
+    while len(remaining) > 1:
+        deltas = move_deltas(state, data, remaining, guide[remaining])
+        budget['evaluations'] += len(remaining)
+        position = int(deltas.argmin())
+        apply_move(state, data, int(remaining[position]), int(guide[remaining[position]]))
+        remaining = np.delete(remaining, position)
+        if state['total'] < best_cost:
+            best_cost, best_solution = state['total'], state['solution'].copy()
+    if best_solution is None:
+        return None, float('inf')
+    return local_search(best_solution, data, 0, budget, candidate_lists)
+
+# Dados e listas de candidatos do GRASP (sequencial ou paralelo): modo esparso, capacitado ou denso
+def load_grasp_data(filename, num_candidates=None, sparse=None, capacitated=False):
+    if sparse:
+        data = read_sparse(filename, sparse)
+    elif capacitated:
+        data = read_capacitated(filename, None if capacitated is True else capacitated)
+    else:
+        data = read_data(filename)
+    candidates = candidate_lists(data, num_candidates) if num_candidates else None  # Listas de candidatos (da cache)
+    if sparse and candidates is None:
+        candidates = data['arcs']  # No modo esparso os movimentos possíveis são os arcos
+    return data, candidates
+
+# verbosity: 0 não escreve nada, 1 ou mais escreve o progresso (custos)
+# elite_size: tamanho do conjunto de elite usado na religação de caminhos (0 desliga a religação)
+# min_distance: distância de Hamming mínima entre soluções de elite (por omissão 2% dos clientes)
+# num_candidates (opcional): restringe a construção e a busca local aos num_candidates armazéns mais baratos de cada cliente
+# checkpoint (opcional): ficheiro onde a melhor solução e o conjunto de elite são guardados a cada checkpoint_interval
+# iterações e no fim; com resume=True continua a partir desse ficheiro (as sementes de cada iteração não dependem das anteriores)
+# sparse (opcional): modo esparso com os sparse arcos mais baratos de cada cliente (ver Instance.read_sparse)
+# capacitated: True usa as capacidades do ficheiro; um número é a capacidade dos armazéns de capa/capb/capc
+# (ver Instance.read_capacitated)
+def grasp(filename, max_iterations, seed, budget=None, verbosity=2, num_candidates=None, elite_size=10, min_distance=None,
+          checkpoint=None, checkpoint_interval=100, resume=False, sparse=None, capacitated=False):
+    data, candidates = load_grasp_data(filename, num_candidates, sparse, capacitated)  # Lê os dados do arquivo
+    budget = budget if budget is not None else new_budget()  # Orçamento de tempo/avaliações (ilimitado por omissão)
     best_solution = None  # Inicializa a melhor solução como None
     best_cost = float('inf')  # Inicializa o melhor custo como infinito
+    elite = []  # Conjunto de elite: (custo, solução) ordenado pelo custo
+    min_distance = min_distance if min_distance is not None else max(1, len(data['costs']) // 50)
+    first_iteration = 0
+    
+    saved = load_checkpoint(checkpoint) if resume else None
+    if saved is not None:
+        first_iteration = int(saved['iteration'])
+        best_cost = float(saved['best_cost'])
+        best_solution = saved['best_solution'].tolist() if len(saved['best_solution']) else None
+        elite = [(float(cost), solution) for cost, solution in zip(saved['elite_costs'], saved['elite_solutions'])]
+        budget['evaluations'] += int(saved['evaluations'])
+        record_incumbent(budget, best_cost)
     
-    for iteration in range(max_iterations):
-        print(f"Iniciando iteração {iteration + 1} do GRASP")  # Exibe uma mensagem indicando o início da iteração
-        warehouses_copy = [wh.copy() for wh in data['warehouses']]  # Cria uma cópia dos armazéns
-        initial_solution = greedy_randomized_construction({'warehouses': warehouses_copy, 'customers': data['customers']}, seed)  # Gera uma solução inicial
+    completed = first_iteration  # Iterações já feitas (a guardar no ponto de retoma)
+    for iteration in range(first_iteration, max_iterations):
+        if budget_exhausted(budget):
+            break  # Orçamento esgotado: devolve a melhor solução encontrada até agora
+        if verbosity >= 1:
+            print(f"Iniciando iteração {iteration + 1} do GRASP")  # Exibe uma mensagem indicando o início da iteração
+        with phase(budget, 'construct'):
+            initial_solution = greedy_randomized_construction(data, iteration_seed(seed, iteration), candidates)  # Gera uma solução inicial
+        budget['evaluations'] += candidates.size if candidates is not None else data['costs'].size  # Avaliações da construção
+        count(budget, 'constructions')
         
-        solution, cost = local_search(initial_solution, data['warehouses'], data['customers'])  # Realiza a busca local
+        with phase(budget, 'search'):
+            solution, cost = local_search(initial_solution, data, verbosity, budget, candidates)  # Realiza a busca local
+        solution = np.array(solution)
+        
+        # Religação de caminhos entre o novo ótimo local e uma solução de elite escolhida ao acaso
+        if elite and not budget_exhausted(budget):
+            rng = random.Random(iteration_seed(seed, iteration, stream=1))
+            _, guide = rng.choice(elite)
+            with phase(budget, 'relink'):
+                relinked_solution, relinked_cost = path_relinking(solution, guide, data, budget, candidates)
+            count(budget, 'relinkings')
+            if relinked_cost < cost:
+                solution, cost = np.array(relinked_solution), relinked_cost
+                if verbosity >= 1:
+                    print(f"Religação de caminhos melhorou a solução para {cost:.5f}")
+        if cost < np.inf:
+            update_elite(elite, solution, cost, elite_size, min_distance)  # Só soluções viáveis (modo capacitado)
         
         if cost < best_cost:
-            best_solution = solution  # Atualiza a melhor solução
+            best_solution = solution.tolist()  # Atualiza a melhor solução
             best_cost = cost  # Atualiza o melhor custo
-            print(f"Nova melhor solução encontrada na iteração {iteration + 1} com custo {best_cost:.5f}")  # Exibe a nova melhor solução
+            gap = record_incumbent(budget, best_cost)  # Gap em relação ao limite inferior (se conhecido)
+            count(budget, 'improvements')
+            if verbosity >= 1:
+                gap_text = f" (gap {gap:.3f}%)" if gap is not None else ""
+                print(f"Nova melhor solução encontrada na iteração {iteration + 1} com custo {best_cost:.5f}{gap_text}")  # Exibe a nova melhor solução
+        report_progress(budget, iteration=iteration + 1)
+        
+        completed = iteration + 1
+        if checkpoint is not None and completed % checkpoint_interval == 0:
+            write_checkpoint(checkpoint, completed, best_solution, best_cost, elite, len(data['costs']), budget)
+    
+    if checkpoint is not None:
+        write_checkpoint(checkpoint, completed, best_solution, best_cost, elite, len(data['costs']), budget)
+    return best_solution, best_cost  # Retorna a melhor solução e seu custo
+
+# Ponto de retoma do GRASP: iterações feitas, melhor solução e conjunto de elite (custos e matriz de soluções)
+def write_checkpoint(checkpoint, iteration, best_solution, best_cost, elite, num_customers, budget):
+    save_checkpoint(checkpoint, iteration=iteration, best_cost=best_cost,
+                    best_solution=np.array(best_solution if best_solution is not None else [], dtype=np.int64),
+                    elite_costs=np.array([cost for cost, _ in elite]),
+                    elite_solutions=np.array([solution for _, solution in elite], dtype=np.int64).reshape(-1, num_customers),
+                    evaluations=budget['evaluations'])
+
+# Estado de cada processo do GRASP paralelo: a instância é carregada uma única vez por processo
+# (a matriz de custos vem da cache memory-mapped, partilhada entre processos pela cache de páginas do sistema)
+_worker = {}
+
+def _init_worker(filename, seed, num_candidates, sparse, capacitated, deadline):
+    _worker['data'], _worker['candidates'] = load_grasp_data(filename, num_candidates, sparse, capacitated)
+    _worker['seed'] = seed
+    _worker['deadline'] = deadline
+
+# Uma iteração do GRASP num processo: devolve apenas (custo, solução num vetor compacto, avaliações)
+# A busca local para no prazo do orçamento principal (deadline), se houver
+def _grasp_iteration(iteration):
+    data = _worker['data']
+    candidates = _worker['candidates']
+    deadline = _worker['deadline']
+    budget = new_budget(deadline - time.time() if deadline is not None else None)
+    initial_solution = greedy_randomized_construction(data, iteration_seed(_worker['seed'], iteration), candidates)
+    budget['evaluations'] += candidates.size if candidates is not None else data['costs'].size
+    solution, cost = local_search(initial_solution, data, verbosity=0, budget=budget, candidate_lists=candidates)
+    return cost, np.array(solution, dtype=np.int32), budget['evaluations']
+
+# As iterações são independentes (cada uma com a sua semente) e o melhor resultado é escolhido aqui, pela ordem das
+# iterações; verbosity: 0 não escreve nada, 1 ou mais escreve as novas melhores soluções (como em grasp())
+# budget, sparse e capacitated como em grasp(): o orçamento é verificado aqui entre iterações (as iterações já em curso
+# são descartadas quando se esgota) e o prazo é passado aos processos, para a busca local parar a tempo
+# Sem conjunto de elite, religação de caminhos nem pontos de retoma (dependem das iterações anteriores)
+def parallel_grasp(filename, max_iterations, seed, workers=None, num_candidates=None, verbosity=2, budget=None,
+                   sparse=None, capacitated=False):
+    load_grasp_data(filename, num_candidates, sparse, capacitated)  # Caches (e candidatos) antes de criar os processos
+    context = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+    workers = workers or os.cpu_count()
+    budget = budget if budget is not None else new_budget()
+    best_solution = None  # Inicializa a melhor solução como None
+    best_cost = float('inf')  # Inicializa o melhor custo como infinito
+    pending = {}  # Iterações enviadas e ainda não processadas (no máximo 2 por processo)
+    next_iteration = 0
+    
+    initargs = (filename, seed, num_candidates, sparse, capacitated, budget['deadline'])
+    with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        # Os resultados são processados pela ordem das iterações: o resultado é igual ao do GRASP sequencial com a
+        # mesma semente e elite_size=0 (sem orçamento que pare a meio)
+        for iteration in range(max_iterations):
+            while next_iteration < max_iterations and len(pending) < 2 * workers and not budget_exhausted(budget):
+                pending[next_iteration] = pool.apply_async(_grasp_iteration, (next_iteration,))
+                next_iteration += 1
+            if iteration not in pending:
+                break  # Orçamento esgotado
+            cost, solution, evaluations = pending.pop(iteration).get()
+            budget['evaluations'] += evaluations
+            count(budget, 'constructions')
+            if cost < best_cost:
+                best_solution = solution.tolist()  # Atualiza a melhor solução
+                best_cost = cost  # Atualiza o melhor custo
+                gap = record_incumbent(budget, best_cost)  # Gap em relação ao limite inferior (se conhecido)
+                count(budget, 'improvements')
+                if verbosity >= 1:
+                    gap_text = f" (gap {gap:.3f}%)" if gap is not None else ""
+                    print(f"Nova melhor solução encontrada na iteração {iteration + 1} com custo {best_cost:.5f}{gap_text}")  # Exibe a nova melhor solução
+            report_progress(budget, iteration=iteration + 1)
+            if budget_exhausted(budget):
+                break
     
     return best_solution, best_cost  # Retorna a melhor solução e seu custo
 
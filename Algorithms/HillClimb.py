@@ -1,101 +1,174 @@
 import time
 import random
+from collections import deque
+import numpy as np
+from Instance import read_data, assignment_costs
+from Evaluation import (EPSILON, new_state, best_improving_move, apply_move, customer_deltas, candidate_deltas,
+                        all_move_deltas, all_candidate_deltas, feasible_cost, escalate_penalty)
+from Facilities import new_facility_state, best_facility_move, apply_facility_move
+from Budget import new_budget, budget_exhausted, record_incumbent
+from Instrumentation import count, report_progress
 
-# Função para ler os dados do arquivo de entrada
-def read_data(filename):
-    with open(filename, 'r') as file:
-        lines = file.readlines()
+# Fila de clientes ativos para a primeira melhoria (don't-look bits: um cliente fora da fila não é reexaminado)
+# shuffle: percorre os clientes por ordem aleatória (random.shuffle) em vez da ordem do ficheiro
+def new_active_queue(num_customers, shuffle=False):
+    order = list(range(num_customers))
+    if shuffle:
+        random.shuffle(order)
+    return {'queue': deque(order), 'queued': np.ones(num_customers, dtype=bool), 'full': set(), 'shuffle': shuffle}
 
-    # Extrair o número de armazéns e clientes do cabeçalho do arquivo
-    m, n = map(int, lines[0].split())
-    data = {'warehouses': [], 'customers': []}
+def _enqueue(active, customers):
+    customers = [customer_idx for customer_idx in customers.tolist() if not active['queued'][customer_idx]]
+    if active['shuffle']:
+        random.shuffle(customers)
+    active['queued'][customers] = True
+    active['queue'].extend(customers)
 
-    # Leitura dos dados dos armazéns
-    for i in range(1, m + 1):
-        parts = lines[i].split()
-        fixed_cost = float(parts[1])  # Custo fixo do armazém
-        data['warehouses'].append({'fixed_cost': fixed_cost})
-
-    line_index = m + 1
-    while line_index < len(lines):
-        # Leitura do número do cliente (ignorada, pois não é necessária)
-        customer_number = int(lines[line_index].strip())
-        line_index += 1
-
-        # Leitura dos custos de alocação do cliente para cada armazém
-        costs = []
-        while line_index < len(lines) and not lines[line_index].strip().isdigit():
-            costs.extend(map(float, lines[line_index].strip().split()))
-            line_index += 1
-
-        # Adicionar o cliente à lista com os custos combinados
-        data['customers'].append({'costs': costs})
-
-    return data
+# Primeira melhoria: tira clientes da fila até encontrar um com um movimento que melhora (o melhor desse cliente)
+# Com listas de candidatos só examina os candidatos; quando a fila esvazia confirma o ótimo local na vizinhança
+# completa e volta a ativar os clientes com um movimento fora dos candidatos. Devolve (movimento ou None, avaliações)
+# No modo esparso a vizinhança completa são todos os arcos (data['arcs']); no modo capacitado a confirmação é feita
+# mesmo sem candidatos, porque a fila não acorda os clientes que ganham com a capacidade libertada noutro armazém
+def first_improving_move(state, data, active, candidate_lists=None):
+    evaluations = 0
+    while True:
+        while active['queue']:
+            customer_idx = active['queue'].popleft()
+            active['queued'][customer_idx] = False
+            if candidate_lists is not None and customer_idx not in active['full']:
+                deltas = candidate_deltas(state, data, customer_idx, candidate_lists)
+                warehouses = candidate_lists[customer_idx]
+            else:
+                active['full'].discard(customer_idx)
+                deltas = customer_deltas(state, data, customer_idx)
+                warehouses = None
+            evaluations += len(deltas)
+            position = int(deltas.argmin())
+            if deltas[position] < -EPSILON:
+                return (customer_idx, int(warehouses[position]) if warehouses is not None else position), evaluations
+        if candidate_lists is None and 'capacities' not in data:
+            return None, evaluations
+        deltas = all_candidate_deltas(state, data, data['arcs']) if 'arcs' in data else all_move_deltas(state, data)
+        evaluations += deltas.size
+        improving = np.flatnonzero(deltas.min(axis=1) < -EPSILON)
+        if not len(improving):
+            return None, evaluations
+        active['full'].update(improving.tolist())
+        _enqueue(active, improving)
 
-# Função para calcular o custo total de uma solução de alocação
-def calculate_total_cost(solution, warehouses, customers):
-    total_cost = 0
-    warehouse_used = [False] * len(warehouses)  # Lista para rastrear se o armazém foi usado
-    
-    for customer_idx, warehouse_idx in enumerate(solution):
-        warehouse = warehouses[warehouse_idx]
-        customer = customers[customer_idx]
-        
-        # Adiciona o custo fixo do armazém se for a primeira vez que o armazém é usado
-        if not warehouse_used[warehouse_idx]:
-            total_cost += warehouse['fixed_cost']
-            warehouse_used[warehouse_idx] = True
-        
-        # Adiciona o custo variável do cliente para o armazém atual
-        total_cost += customer['costs'][warehouse_idx]
-    
-    return total_cost
+# Depois de mover o cliente de old_idx para new_idx, ativa só os clientes cujos movimentos podem ter melhorado:
+# se new_idx foi aberto, os que passam a ganhar ao mudar para ele; se old_idx ficou com um só cliente, esse cliente
+# (pode agora fechar o armazém). Fechar um armazém ou juntar clientes só torna os outros movimentos piores
+# No modo capacitado acorda também os clientes de new_idx, que podem ganhar ao sair do armazém mais carregado
+def wake_customers(state, data, active, old_idx, new_idx, opened):
+    solution, counts = state['solution'], state['counts']
+    if opened:
+        customers = np.arange(len(solution))
+        if 'arcs' in data:
+            column = assignment_costs(data, customers, np.full(len(solution), new_idx))
+        else:
+            column = np.asarray(data['costs'][:, new_idx])
+        closing_savings = np.where(counts[solution] == 1, data['fixed_costs'][solution], 0.0)
+        gains = column - assignment_costs(data, customers, solution) - closing_savings
+        _enqueue(active, np.flatnonzero((gains < -EPSILON) & (solution != new_idx)))
+    if counts[old_idx] == 1:
+        _enqueue(active, np.flatnonzero(solution == old_idx))
+    if 'capacities' in data:
+        _enqueue(active, np.flatnonzero(solution == new_idx))
 
 # Função para realizar a busca local
-def local_search(initial_solution, warehouses, customers):
+# verbosity: 0 não escreve nada, 1 escreve só os custos, 2 escreve também as soluções completas
+# candidate_lists (opcional): matriz n x k com os armazéns candidatos de cada cliente (ver Instance.candidate_lists)
+# move_type: 'customer' muda um cliente de armazém; 'facility' abre, fecha ou troca armazéns (ver Facilities.py)
+# strategy (movimentos de cliente): 'best' aplica o melhor movimento de cada passagem completa; 'first' aplica o primeiro
+# cliente que melhora, com uma fila de clientes ativos; shuffle percorre essa fila por ordem aleatória
+# No modo capacitado (Instance.read_capacitated) a pesquisa segue o custo penalizado e, num ótimo local inviável,
+# aumenta a penalização e continua; devolve o custo real, ou infinito se não chegar a uma solução viável
+def local_search(initial_solution, data, budget=None, verbosity=2, candidate_lists=None, move_type='customer',
+                 strategy='best', shuffle=False):
     start_time = time.time()
     
-    current_solution = initial_solution[:]
-    best_solution = current_solution[:]
-    best_cost = calculate_total_cost(best_solution, warehouses, customers)
+    # Estado incremental: o custo de cada vizinho é obtido em O(1) sem copiar a solução
+    if move_type == 'facility':
+        state = new_facility_state(initial_solution, data)  # Já com cada cliente no armazém aberto mais barato
+    else:
+        state = new_state(initial_solution, data)
+    best_cost = feasible_cost(state)
+    best_solution = None  # Melhor solução viável quando já não é a do estado (só no modo capacitado)
+    budget = budget if budget is not None else new_budget()
+    record_incumbent(budget, best_cost)
     
-    print(f"Initial Solution: {best_solution}")
-    print(f"Initial Cost: {best_cost:.5f}")
-    print("")
+    if verbosity >= 2:
+        print(f"Initial Solution: {initial_solution}")
+    if verbosity >= 1:
+        print(f"Initial Cost: {best_cost:.5f}")
+        print("")
 
-    while True:
-        found_better = False
-        for customer_idx in range(len(customers)):
-            current_warehouse_idx = current_solution[customer_idx]
-            
-            for new_warehouse_idx in range(len(warehouses)):
-                if new_warehouse_idx != current_warehouse_idx:
-                    new_solution = current_solution[:]
-                    new_solution[customer_idx] = new_warehouse_idx
-                    
-                    new_cost = calculate_total_cost(new_solution, warehouses, customers)
-                    
-                    # Verifica se a nova solução é melhor que a melhor solução atual
-                    if new_cost < best_cost:
-                        best_solution = new_solution[:]
-                        best_cost = new_cost
-                        found_better = True
-                        print(f"Found better solution:")
-                        print(f"  Solution: {best_solution}")
-                        print(f"  Cost: {best_cost:.5f}")
-                        print("")
-        
-        # Se não encontrou uma solução melhor, encerra o loop
-        if not found_better:
-            break
+    active = new_active_queue(len(data['costs']), shuffle) if strategy == 'first' else None
+    while not budget_exhausted(budget):
+        if move_type == 'facility':
+            # Melhor abertura, fecho ou troca de armazéns
+            best_move, delta, evaluations = best_facility_move(state, data)
+            budget['evaluations'] += evaluations
+            if best_move is None or delta >= -EPSILON:
+                break
+            apply_facility_move(state, data, *best_move)
+            count(budget, 'facility_moves')
+            previous = None
+        elif active is not None:
+            best_move, evaluations = first_improving_move(state, data, active, candidate_lists)
+            budget['evaluations'] += evaluations
+            if best_move is None:
+                if escalate_penalty(state, data):
+                    continue  # Ótimo local inviável: continua com uma penalização maior
+                break  # Fila vazia: ótimo local
+            customer_idx, new_warehouse_idx = best_move
+            old_warehouse_idx = state['solution'][customer_idx]
+            opened = state['counts'][new_warehouse_idx] == 0
+            apply_move(state, data, customer_idx, new_warehouse_idx)
+            wake_customers(state, data, active, old_warehouse_idx, new_warehouse_idx, opened)
+            count(budget, 'moves')
+            previous = (customer_idx, old_warehouse_idx)
         else:
-            current_solution = best_solution[:]  # Atualiza a solução atual para a melhor encontrada
+            # Procura o melhor movimento (cliente, armazém) da vizinhança: O(n·m) por passagem (O(n·k) com candidatos)
+            best_move, evaluations = best_improving_move(state, data, candidate_lists)
+            budget['evaluations'] += evaluations
+            
+            # Se não encontrou uma solução melhor, encerra o loop (ou, se for inviável, aumenta a penalização)
+            if best_move is None:
+                if escalate_penalty(state, data):
+                    continue
+                break
+
+            previous = (best_move[0], state['solution'][best_move[0]])
+            apply_move(state, data, *best_move)  # Atualiza a solução atual para a melhor encontrada
+            count(budget, 'moves')
+        cost = feasible_cost(state)
+        if cost >= best_cost:
+            # Modo capacitado: a pesquisa passou por soluções inviáveis; se acabou de sair da melhor solução viável,
+            # guarda-a (só nessa passagem, para não copiar a solução a cada movimento)
+            if best_solution is None and best_cost < np.inf:
+                best_solution = state['solution'].copy()
+                best_solution[previous[0]] = previous[1]
+            continue
+        best_cost, best_solution = cost, None
+        gap = record_incumbent(budget, best_cost)
+        count(budget, 'improvements')
+        report_progress(budget)
+        if verbosity >= 1:
+            print(f"Found better solution:")
+            if verbosity >= 2:
+                print(f"  Solution: {state['solution'].tolist()}")
+            print(f"  Cost: {best_cost:.5f}")
+            if gap is not None:
+                print(f"  Gap: {gap:.3f}%")
+            print("")
     
     end_time = time.time()
     execution_time = end_time - start_time
     
-    return best_solution, best_cost, execution_time
+    solution = state['solution'] if best_solution is None else best_solution
+    return solution.tolist(), best_cost, execution_time
 
 # Função para gerar uma solução inicial aleatória
 def generate_random_solution(num_customers, num_warehouses):
@@ -104,14 +177,14 @@ def generate_random_solution(num_customers, num_warehouses):
 # Função principal que coordena todo o processo
 def main(filename):
     data = read_data(filename)  # Lê os dados do arquivo de entrada
-    num_customers = len(data['customers'])
-    num_warehouses = len(data['warehouses'])
+    num_customers = len(data['costs'])
+    num_warehouses = len(data['fixed_costs'])
     
     # Gera uma solução inicial aleatória
     initial_solution = generate_random_solution(num_customers, num_warehouses)
     
     # Executa a busca local usando a solução inicial aleatória
-    best_solution, best_cost, execution_time = local_search(initial_solution, data['warehouses'], data['customers'])
+    best_solution, best_cost, execution_time = local_search(initial_solution, data)
     
     # Exibe o resultado da busca local
     print("\nMelhor solução encontrada pela Pesquisa Local:")
@@ -0,0 +1,272 @@
+import os  # Importa a biblioteca os para gerir os ficheiros de cache
+import warnings  # Importa a biblioteca warnings para detetar valores inválidos na leitura
+import numpy as np  # Importa a biblioteca numpy para guardar a matriz de custos
+
+# Versão do formato da cache (incrementar sempre que o conteúdo da cache mudar)
+CACHE_VERSION = 2
+
+# Caminhos dos ficheiros de cache guardados ao lado do ficheiro original
+def cache_paths(filename):
+    return filename + '.costs.npy', filename + '.meta.npz'
+
+# Tamanho de cada bloco lido do ficheiro de texto
+CHUNK_SIZE = 1 << 20
+
+# Lê o ficheiro em blocos, cortados sempre num espaço para que nenhum número fique dividido entre dois blocos
+def _text_chunks(file, chunk_size):
+    remainder = b''
+    while True:
+        block = file.read(chunk_size)
+        if not block:
+            if remainder:
+                yield remainder
+            return
+        block = remainder + block
+        cut = max(block.rfind(b' '), block.rfind(b'\n'), block.rfind(b'\t'), block.rfind(b'\r')) + 1
+        remainder = block[cut:]
+        if cut:
+            yield block[:cut]
+
+# Converte um bloco de texto só com números num vetor (erro se houver algum token não numérico)
+def _parse_numbers(text):
+    if not text or text.isspace():
+        return np.empty(0)  # np.fromstring devolve [-1.] para um texto só com espaços
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=np.float64, sep=' ')
+        except (DeprecationWarning, ValueError):  # Conforme a versão do numpy: aviso ou erro
+            raise ValueError("Valor não numérico na secção dos clientes") from None
+
+# Lê as dimensões e os armazéns: os primeiros 2 + 2m tokens (a capacidade pode ser a palavra 'capacity')
+# Devolve os tokens e o resto do texto já lido, que pertence à secção dos clientes
+def _read_header(chunks):
+    tokens, text = [], b''
+    needed = 2  # Primeiro só m e n; depois os pares (capacidade, custo fixo) dos m armazéns
+    while True:
+        missing = needed - len(tokens)
+        parts = text.split(None, missing)
+        if len(parts) < missing:
+            tokens += parts
+            text = next(chunks, None)
+            if text is None:
+                raise ValueError("Ficheiro terminou antes do fim dos dados dos armazéns")
+            continue
+        tokens += parts[:missing]
+        text = parts[missing] if len(parts) > missing else b''
+        if needed > 2:
+            return tokens, text
+        needed = 2 + 2 * int(tokens[0])
+
+# Função para ler o ficheiro de texto (formato ORLIB / Kratica) em blocos, sem guardar o texto todo em memória
+# Os custos são escritos diretamente numa matriz pré-alocada por allocate(shape) (por exemplo um ficheiro memory-mapped)
+# progress(lidos, total) é chamado após cada bloco com o número de bytes lidos e o tamanho do ficheiro
+# Devolve (custos fixos, custos, capacidades, procuras); a palavra 'capacity' (capa/capb/capc) fica como NaN
+def parse_instance(filename, allocate=None, progress=None, chunk_size=CHUNK_SIZE):
+    total_size = os.path.getsize(filename)
+    with open(filename, 'rb') as file:
+        chunks = _text_chunks(file, chunk_size)
+        tokens, text = _read_header(chunks)
+
+        # Extrair o número de armazéns (m) e clientes (n), as capacidades e os custos fixos
+        m, n = int(tokens[0]), int(tokens[1])
+        fixed_costs = np.array([float(token) for token in tokens[3::2]])
+        capacities = np.array([float(token) if token != b'capacity' else np.nan for token in tokens[2::2]])
+        costs = allocate((n, m)) if allocate is not None else np.empty((n, m), dtype=np.float64)
+        demands = np.empty(n)
+
+        # Cada cliente ocupa m + 1 valores: a procura seguida dos custos de alocação para cada armazém
+        record_size = m + 1
+        row = 0
+        carry = np.empty(0)  # Valores de um cliente incompleto no fim do bloco anterior
+        while text is not None:
+            values = _parse_numbers(text)
+            if len(carry):
+                values = np.concatenate((carry, values))
+            complete = len(values) // record_size
+            if row + complete > n:
+                raise ValueError(f"Ficheiro {filename} tem mais clientes do que os {n} do cabeçalho")
+            block = values[:complete * record_size].reshape(complete, record_size)
+            costs[row:row + complete] = block[:, 1:]
+            demands[row:row + complete] = block[:, 0]
+            row += complete
+            carry = values[complete * record_size:]
+            if progress is not None:
+                progress(file.tell(), total_size)
+            text = next(chunks, None)
+
+    if row != n or len(carry):
+        raise ValueError(f"Ficheiro {filename} não corresponde ao cabeçalho {m} x {n}")
+    return fixed_costs, costs, capacities, demands
+
+# Verifica se a cache existe e corresponde à versão atual do ficheiro original
+# Sem ficheiro original (instâncias geradas diretamente na cache, ver Generator.py) basta a versão coincidir
+def _cache_is_valid(filename, meta_path, costs_path):
+    if not (os.path.exists(meta_path) and os.path.exists(costs_path)):
+        return False
+    with np.load(meta_path) as meta:
+        if int(meta['version']) != CACHE_VERSION:
+            return False
+        return not os.path.exists(filename) or int(meta['source_mtime']) == os.stat(filename).st_mtime_ns
+
+# Constrói a cache lendo o ficheiro de texto diretamente para o ficheiro .npy memory-mapped
+# O pico de memória não depende do tamanho do texto: os custos vão diretamente para o disco
+def build_cache(filename, progress=None):
+    costs_path, _ = cache_paths(filename)
+    tmp_costs = costs_path + '.tmp.npy'
+    source_mtime = os.stat(filename).st_mtime_ns  # Lido antes da leitura: uma alteração durante a leitura invalida a cache
+    try:
+        fixed_costs, costs, capacities, demands = parse_instance(
+            filename, lambda shape: np.lib.format.open_memmap(tmp_costs, mode='w+', dtype=np.float64, shape=shape),
+            progress)
+        costs.flush()
+        del costs
+        finish_cache(filename, fixed_costs, tmp_costs, source_mtime, capacities, demands)
+    finally:
+        if os.path.exists(tmp_costs):
+            os.remove(tmp_costs)
+
+# Grava os metadados e coloca os ficheiros da cache no lugar definitivo (o .npy dos custos já está escrito em tmp_costs)
+# Os metadados incluem as capacidades e as procuras (só usadas no modo capacitado, ver read_capacitated)
+def finish_cache(filename, fixed_costs, tmp_costs, source_mtime, capacities, demands):
+    costs_path, meta_path = cache_paths(filename)
+    tmp_meta = meta_path + '.tmp.npz'
+    np.savez(tmp_meta, version=CACHE_VERSION, source_mtime=source_mtime, fixed_costs=fixed_costs, capacities=capacities,
+             demands=demands)
+    os.replace(tmp_costs, costs_path)
+    os.replace(tmp_meta, meta_path)
+
+# Lê a instância completa (custos fixos, custos, capacidades, procuras) da cache, construindo-a se for preciso
+# Devolve também o nome do ficheiro usado para as caches derivadas (None quando não foi possível usar a cache)
+def _load_instance(filename, use_cache, progress):
+    costs_path, meta_path = cache_paths(filename)
+
+    if use_cache and not _cache_is_valid(filename, meta_path, costs_path):
+        try:
+            build_cache(filename, progress)
+        except OSError:
+            use_cache = False  # Diretório só de leitura: continua sem cache
+
+    if not use_cache:
+        return (*parse_instance(filename, progress=progress), None)
+    with np.load(meta_path) as meta:
+        fixed_costs, capacities, demands = meta['fixed_costs'], meta['capacities'], meta['demands']
+    costs = np.load(costs_path, mmap_mode='r')  # A matriz de custos não é copiada para memória
+    return fixed_costs, costs, capacities, demands, filename
+
+# Função para ler os dados: usa a cache binária (memory-mapped) sempre que possível
+def read_data(filename, use_cache=True, progress=None):
+    fixed_costs, costs, _, _, cache_name = _load_instance(filename, use_cache, progress)
+    # costs[i, j] é o custo de alocar o cliente i ao armazém j
+    return {'fixed_costs': fixed_costs, 'costs': costs, 'filename': cache_name}
+
+# Modo capacitado (single-source): cada armazém j serve no máximo capacities[j] da procura total dos seus clientes
+# capacity substitui a palavra 'capacity' dos ficheiros capa/capb/capc (um valor da Tabela 1 de Beasley, 1988);
+# sem ela esses ficheiros dão erro. penalty é o custo por unidade de procura acima da capacidade com que as pesquisas
+# atravessam soluções inviáveis (ver Evaluation.new_state): por omissão exceder a capacidade pela procura média de um
+# cliente custa o mesmo que abrir um armazém médio
+def read_capacitated(filename, capacity=None, use_cache=True, progress=None):
+    fixed_costs, costs, capacities, demands, cache_name = _load_instance(filename, use_cache, progress)
+    placeholders = np.isnan(capacities)
+    if placeholders.any():
+        if capacity is None:
+            raise ValueError(f"O ficheiro {filename} não tem as capacidades: indicar a capacidade dos armazéns")
+        capacities = np.where(placeholders, float(capacity), capacities)
+    if capacities.sum() < demands.sum():
+        raise ValueError(f"Capacidade total {capacities.sum():g} menor do que a procura total {demands.sum():g}")
+    penalty = max(float(fixed_costs.mean()), 1.0) / (float(demands.mean()) or 1.0)
+    return {'fixed_costs': fixed_costs, 'costs': costs, 'capacities': capacities, 'demands': demands,
+            'penalty': penalty, 'filename': cache_name}
+
+# Dimensões (n, m) de uma instância sem ler os custos: da cache se for válida, senão do cabeçalho "m n" do texto
+def instance_shape(filename):
+    costs_path, meta_path = cache_paths(filename)
+    if _cache_is_valid(filename, meta_path, costs_path):
+        return np.load(costs_path, mmap_mode='r').shape
+    with open(filename, 'rb') as file:
+        tokens = file.read(256).split()[:2]
+    if len(tokens) < 2:
+        raise ValueError(f"Ficheiro {filename} sem cabeçalho m n")
+    m, n = int(tokens[0]), int(tokens[1])
+    return n, m
+
+# Listas de candidatos: os k armazéns com menor custo de alocação para cada cliente (matriz n x k, por ordem de custo)
+# Calculadas uma vez por instância com argpartition e guardadas junto da cache (<ficheiro>.cand<k>.npy)
+# No modo esparso os candidatos são os primeiros k arcos de cada cliente (já ordenados pelo custo)
+def candidate_lists(data, k):
+    if 'arcs' in data:
+        return data['arcs'][:, :k]
+    num_customers, num_warehouses = data['costs'].shape
+    k = min(k, num_warehouses)
+    filename = data.get('filename')
+    if filename is not None:
+        candidates_path = f"{filename}.cand{k}.npy"
+        costs_path, _ = cache_paths(filename)
+        # Válida enquanto for mais recente do que a cache dos custos (reconstruída quando o ficheiro muda)
+        if os.path.exists(candidates_path) and os.path.getmtime(candidates_path) >= os.path.getmtime(costs_path):
+            return np.load(candidates_path)
+
+    costs = data['costs']
+    candidates = np.empty((num_customers, k), dtype=np.int32)
+    for start in range(0, num_customers, 1024):  # Por blocos de clientes para limitar a memória temporária
+        block = np.asarray(costs[start:start + 1024])
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k < num_warehouses else np.tile(np.arange(k), (len(block), 1))
+        order = np.argsort(np.take_along_axis(block, nearest, axis=1), axis=1, kind='stable')
+        candidates[start:start + 1024] = np.take_along_axis(nearest, order, axis=1)
+
+    if filename is not None:
+        try:
+            np.save(candidates_path, candidates)
+        except OSError:
+            pass  # Diretório só de leitura: continua sem guardar
+    return candidates
+
+# Modo esparso para instâncias enormes: guarda só os k arcos mais baratos de cada cliente, ou os de custo <= threshold
+# data['arcs'][i] são os armazéns com arco para o cliente i (por ordem de custo) e data['costs'][i] os custos desses arcos,
+# ambos n x k: a memória cresce com n·k e não com n·m. Com threshold as linhas têm o comprimento da mais longa e as
+# posições a mais repetem o arco mais barato (mesmo armazém, mesmo custo). Alocar um cliente fora dos arcos custa infinito
+# A matriz densa só é lida da cache memory-mapped por blocos de clientes, nunca inteira para memória
+def read_sparse(filename, k=None, threshold=None, progress=None):
+    data = read_data(filename, progress=progress)
+    costs = data['costs']
+    num_customers, num_warehouses = costs.shape
+    if threshold is not None:
+        # Primeira passagem: comprimento das linhas (pelo menos um arco por cliente)
+        k = 1
+        for start in range(0, num_customers, 1024):
+            k = max(k, int((np.asarray(costs[start:start + 1024]) <= threshold).sum(axis=1).max()))
+    arcs = np.array(candidate_lists(data, k), dtype=np.int32)
+    arc_costs = np.empty(arcs.shape, dtype=np.float64)
+    for start in range(0, num_customers, 1024):
+        block_arcs = arcs[start:start + 1024]
+        block = np.take_along_axis(np.asarray(costs[start:start + 1024]), block_arcs, axis=1)
+        if threshold is not None:
+            above = block > threshold
+            above[:, 0] = False  # O arco mais barato fica sempre
+            rows = np.nonzero(above)[0]
+            block[above], block_arcs[above] = block[rows, 0], block_arcs[rows, 0]
+        arc_costs[start:start + 1024] = block
+    return {'fixed_costs': data['fixed_costs'], 'arcs': arcs, 'costs': arc_costs, 'filename': data['filename']}
+
+# Custos de alocar customers[t] a warehouses[t] (vetores), tanto na matriz densa como no modo esparso
+def assignment_costs(data, customers, warehouses):
+    if 'arcs' not in data:
+        return data['costs'][customers, warehouses]
+    matches = data['arcs'][customers] == np.asarray(warehouses)[:, None]
+    positions = matches.argmax(axis=1)
+    return np.where(matches[np.arange(len(positions)), positions], data['costs'][customers, positions], np.inf)
+
+# Custos de alocação do cliente i a cada um dos m armazéns (no modo esparso infinito fora dos arcos)
+def customer_costs(data, customer_idx):
+    if 'arcs' not in data:
+        return data['costs'][customer_idx]
+    costs = np.full(len(data['fixed_costs']), np.inf)
+    costs[data['arcs'][customer_idx]] = data['costs'][customer_idx]
+    return costs
+
+# Função para calcular o custo total de uma solução de alocação
+def calculate_total_cost(solution, data):
+    solution = np.asarray(solution)
+    total_cost = assignment_costs(data, np.arange(len(solution)), solution).sum()  # Custos de alocação
+    total_cost += data['fixed_costs'][np.unique(solution)].sum()  # Custo fixo de cada armazém usado
+    return float(total_cost)
@@ -0,0 +1,99 @@
+import time  # Importa a biblioteca time para medir as fases
+import cProfile  # Importa a biblioteca cProfile para o perfil de uma execução
+import tracemalloc  # Importa a biblioteca tracemalloc para medir as alocações de memória
+from contextlib import contextmanager, nullcontext
+
+# Instrumentação de uma execução, guardada no orçamento (budget['instrumentation'])
+# Com budget['instrumentation'] (ou o próprio budget) a None todas as funções deste módulo só fazem uma verificação (custo quase nulo)
+# progress(registo) é chamado no máximo uma vez a cada progress_interval segundos com um dicionário do progresso
+# trace_allocations: regista também os bytes alocados em cada fase (tracemalloc, bastante mais lento)
+def new_instrumentation(progress=None, progress_interval=1.0, trace_allocations=False):
+    return {
+        'start_time': time.perf_counter(),
+        'counters': {},
+        'phase_times': {},
+        'phase_allocations': {},
+        'progress': progress,
+        'progress_interval': progress_interval,
+        'next_progress': 0.0,
+        'trace_allocations': trace_allocations,
+    }
+
+# Soma amount ao contador name (movimentos aplicados, melhorias, construções, ...)
+def count(budget, name, amount=1):
+    stats = budget['instrumentation'] if budget is not None else None
+    if stats is not None:
+        stats['counters'][name] = stats['counters'].get(name, 0) + amount
+
+_NO_PHASE = nullcontext()
+
+# Mede o tempo (e as alocações) de um bloco: with phase(budget, 'search'): ...
+# Usar só em blocos com trabalho suficiente (uma fase por iteração, nunca por movimento)
+def phase(budget, name):
+    stats = budget['instrumentation'] if budget is not None else None
+    if stats is None:
+        return _NO_PHASE
+    return _timed_phase(stats, name)
+
+@contextmanager
+def _timed_phase(stats, name):
+    allocated = tracemalloc.get_traced_memory()[0] if stats['trace_allocations'] else 0
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats['phase_times'][name] = stats['phase_times'].get(name, 0.0) + time.perf_counter() - start_time
+        if stats['trace_allocations']:
+            growth = max(0, tracemalloc.get_traced_memory()[0] - allocated)
+            stats['phase_allocations'][name] = stats['phase_allocations'].get(name, 0) + growth
+
+# Chama o callback de progresso se já passou o intervalo desde o último registo
+# force: emite sempre (por exemplo no fim da execução)
+def report_progress(budget, force=False, **fields):
+    stats = budget['instrumentation']
+    if stats is None or stats['progress'] is None:
+        return
+    elapsed = time.perf_counter() - stats['start_time']
+    if not force and elapsed < stats['next_progress']:
+        return
+    stats['next_progress'] = elapsed + stats['progress_interval']
+    stats['progress']({'elapsed': elapsed, 'evaluations': budget['evaluations'], 'best_cost': budget['best_cost'],
+                       **stats['counters'], **fields})
+
+# Resumo da instrumentação para o registo do resultado (None se estiver desligada)
+def summary(budget):
+    stats = budget['instrumentation']
+    if stats is None:
+        return None
+    result = {
+        'evaluations': budget['evaluations'],
+        'counters': dict(stats['counters']),
+        'phase_times': dict(stats['phase_times']),
+    }
+    if stats['trace_allocations']:
+        result['phase_allocations'] = dict(stats['phase_allocations'])
+    return result
+
+# Executa function(*args, **kwargs) com cProfile e/ou tracemalloc e guarda os resultados:
+# profile_path recebe as estatísticas do cProfile (ler com pstats ou snakeviz), trace_path as 25 linhas com mais memória
+def profiled_run(function, *args, profile_path=None, trace_path=None, **kwargs):
+    profiler = cProfile.Profile() if profile_path else None
+    tracing = trace_path is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        if profiler is not None:
+            return profiler.runcall(function, *args, **kwargs)
+        return function(*args, **kwargs)
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(profile_path)
+        if trace_path is not None and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with open(trace_path, 'w') as file:
+                file.write(f"Memória atual: {current / 1024:.1f} KiB, pico: {peak / 1024:.1f} KiB\n")
+                for statistic in snapshot.statistics('lineno')[:25]:
+                    file.write(f"{statistic}\n")
+            if tracing:
+                tracemalloc.stop()
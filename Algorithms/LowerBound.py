@@ -0,0 +1,98 @@
+import os  # Importa a biblioteca os para a cache do limite inferior
+import numpy as np  # Importa a biblioteca numpy para as variáveis duais
+from Instance import cache_paths, read_data
+
+# Limite inferior do problema sem capacidades por subida dual (dual ascent, como no DUALLOC de Erlenkotter)
+# Dual: maximizar a soma de v[i] sujeito a, para cada armazém j, soma_i max(0, v[i] - c[i, j]) <= f[j]
+# Qualquer v que respeite as restrições dá um limite inferior certificado do custo ótimo
+def dual_ascent(data):
+    costs = np.asarray(data['costs'])
+    num_customers, num_warehouses = costs.shape
+    order = np.argsort(costs, axis=1, kind='stable')  # Armazéns de cada cliente por custo crescente
+    levels = np.take_along_axis(costs, order, axis=1)
+    values = levels[:, 0].copy()  # v[i] começa no menor custo: nenhuma restrição fica ocupada
+    covered = np.ones(num_customers, dtype=np.int64)  # Armazéns com c[i, j] <= v[i] (os primeiros de order[i])
+    slack = np.array(data['fixed_costs'], dtype=np.float64)  # Folga de cada restrição
+
+    # Cada passagem sobe cada v[i] no máximo até ao custo seguinte, para repartir as folgas entre os clientes
+    improved = True
+    while improved:
+        improved = False
+        for customer_idx in range(num_customers):
+            count = covered[customer_idx]
+            while count < num_warehouses and levels[customer_idx, count] <= values[customer_idx]:
+                count += 1  # Custos empatados com v[i]: passam já a cobertos (senão o aumento seria 0 para sempre)
+            covered[customer_idx] = count
+            warehouses = order[customer_idx, :count]
+            next_level = levels[customer_idx, count] if count < num_warehouses else np.inf
+            increase = min(next_level - values[customer_idx], slack[warehouses].min())
+            if increase <= 0:
+                continue
+            values[customer_idx] += increase
+            slack[warehouses] -= increase
+            improved = True
+            if values[customer_idx] >= next_level:
+                covered[customer_idx] += 1
+    return values
+
+# Melhoria do limite por otimização por subgradiente da relaxação lagrangiana das restrições de afetação
+# L(u) = soma u[i] + soma_j min(0, f[j] + soma_i min(0, c[i, j] - u[i])) é um limite inferior para qualquer u;
+# começa nas variáveis da subida dual (onde L(u) é a soma de v) e devolve o melhor L(u) encontrado
+def subgradient_bound(data, values, iterations=300, step_factor=2.0, patience=20):
+    costs = np.asarray(data['costs'])
+    fixed_costs = data['fixed_costs']
+    multipliers = values.copy()
+    best_bound, best_upper = -np.inf, np.inf
+    no_improvement = 0
+    for _ in range(iterations):
+        reduced = np.minimum(costs - multipliers[:, None], 0.0)
+        facility_values = fixed_costs + reduced.sum(axis=0)
+        opened = facility_values < 0
+        bound = multipliers.sum() + facility_values[opened].sum()
+        if bound > best_bound + 1e-9 * abs(bound):
+            best_bound, no_improvement = bound, 0
+        else:
+            no_improvement += 1
+            if no_improvement >= patience:  # Passo demasiado grande: reduz para metade
+                step_factor, no_improvement = step_factor / 2, 0
+
+        # Solução admissível a partir dos armazéns abertos na relaxação (limite superior para o tamanho do passo)
+        open_set = opened if opened.any() else facility_values == facility_values.min()
+        best_upper = min(best_upper, costs[:, open_set].min(axis=1).sum() + fixed_costs[open_set].sum())
+
+        # Subgradiente: 1 - número de armazéns abertos a que cada cliente fica afetado na relaxação
+        gradient = 1.0 - ((reduced < 0) & opened).sum(axis=1)
+        norm = float(gradient @ gradient)
+        if norm == 0 or best_upper - best_bound <= 1e-9 * abs(best_upper) or step_factor < 1e-4:
+            break  # Limite igual ao custo de uma solução admissível (ótimo) ou passo desprezável
+        multipliers += step_factor * (best_upper - bound) / norm * gradient
+    return float(best_bound)
+
+# Versão do cálculo do limite guardada com ele em <ficheiro>.bound.npy ([versão, limite]): aumentar quando o cálculo
+# muda, para que os limites guardados por uma versão anterior sejam recalculados (como CACHE_VERSION em Instance.py)
+BOUND_VERSION = 2
+
+# Limite inferior (subida dual seguida de subgradiente), guardado junto da cache da instância (<ficheiro>.bound.npy)
+# Devolve None para dados esparsos sem ficheiro (o limite precisa da matriz densa, que só existe na cache)
+def lower_bound(data):
+    filename = data.get('filename')
+    if 'arcs' in data:
+        if filename is None:
+            return None
+        data = read_data(filename)  # O limite é o do problema completo, calculado sobre a matriz densa
+    if filename is not None:
+        bound_path = filename + '.bound.npy'
+        costs_path, _ = cache_paths(filename)
+        # Válido se for desta versão e mais recente do que a cache dos custos (reconstruída quando o ficheiro muda)
+        if os.path.exists(bound_path) and os.path.getmtime(bound_path) >= os.path.getmtime(costs_path):
+            saved = np.load(bound_path)
+            if saved.shape == (2,) and int(saved[0]) == BOUND_VERSION:
+                return float(saved[1])
+
+    bound = subgradient_bound(data, dual_ascent(data))
+    if filename is not None:
+        try:
+            np.save(bound_path, np.array([BOUND_VERSION, bound]))
+        except OSError:
+            pass  # Diretório só de leitura: continua sem guardar
+    return bound
@@ -0,0 +1,318 @@
+import os  # Importa a biblioteca os para os ficheiros enviados e o socket Unix
+import sys  # Importa a biblioteca sys para o código de saída
+import glob  # Importa a biblioteca glob para apagar as instâncias enviadas e as suas caches
+import json  # Importa a biblioteca json para os pedidos e as respostas
+import time  # Importa a biblioteca time para os prazos e o tempo decorrido
+import asyncio  # Importa a biblioteca asyncio para o servidor
+import argparse  # Importa a biblioteca argparse para a linha de comandos
+import tempfile  # Importa a biblioteca tempfile para a pasta das instâncias enviadas
+import threading  # Importa a biblioteca threading para ler os eventos dos processos
+import multiprocessing as mp  # Importa a biblioteca multiprocessing para o conjunto de processos
+from concurrent.futures import ProcessPoolExecutor
+from Instance import read_data
+from LowerBound import lower_bound
+from Instrumentation import new_instrumentation
+from Solver import ALGORITHMS, check_parameters, solve
+
+# Serviço local de resolução (asyncio, HTTP/1.1 sobre TCP ou socket Unix, respostas em JSON):
+#   POST   /jobs              cria um trabalho: {"filename" ou "instance" (texto ORLIB), "algorithm", "seed",
+#                             "time_limit", "max_evaluations", "target_gap", "bound", "deadline", "parameters"}
+#   GET    /jobs              lista os trabalhos
+#   GET    /jobs/<id>         estado, melhor custo até agora (custo, gap, tempo) e o resultado quando terminar
+#   GET    /jobs/<id>/events  incumbentes à medida que aparecem (uma linha JSON por melhoria, até ao resultado final)
+#   POST   /jobs/<id>/stop    para a pesquisa e devolve a melhor solução encontrada até esse momento
+#   DELETE /jobs/<id>         cancela o trabalho (sem esperar pelo resultado)
+# Os trabalhos correm num conjunto limitado de processos reutilizados: a instância é aberta pela cache binária
+# memory-mapped (Instance.read_data), por isso repetir uma instância num processo só volta a mapear a cache
+# deadline (segundos a partir da criação, incluindo a espera na fila): o trabalho para nesse instante com o que tiver
+
+# Valores mínimos dos campos numéricos de um pedido (seed e max_evaluations são inteiros)
+REQUEST_LIMITS = {'seed': 0, 'time_limit': 0, 'max_evaluations': 1, 'target_gap': 0, 'deadline': 0}
+
+# Posições da tabela de paragem (memória partilhada): no máximo MAX_JOBS trabalhos por terminar ao mesmo tempo
+# Cada trabalho recebe uma posição livre, devolvida quando termina (nunca partilhada por dois trabalhos por terminar)
+MAX_JOBS = 4096
+
+# Estado de cada processo do conjunto: tabela de paragem e fila de eventos (herdadas na criação do processo)
+_worker = {}
+
+def _init_worker(stop_flags, events):
+    _worker['stop_flags'] = stop_flags
+    _worker['events'] = events
+
+# Executa um trabalho num processo do conjunto e devolve o registo de Solver.solve
+# Cada melhoria do incumbente é enviada para o serviço pela fila de eventos
+def _run_job(job_id, slot, filename, algorithm, seed, time_limit, max_evaluations, target_gap, with_bound, deadline,
+             parameters):
+    stop_flags, events = _worker['stop_flags'], _worker['events']
+    if deadline is not None:
+        remaining = deadline - time.time()
+        time_limit = remaining if time_limit is None else min(time_limit, remaining)
+    events.put((job_id, None))  # Início da execução
+    bound = lower_bound(read_data(filename)) if with_bound or target_gap is not None else None
+    last = {'cost': float('inf')}
+
+    def progress(record):
+        if record['best_cost'] < last['cost']:
+            last['cost'] = record['best_cost']
+            gap = 100 * (record['best_cost'] - bound) / abs(bound) if bound is not None else None
+            events.put((job_id, {'cost': record['best_cost'], 'gap': gap, 'elapsed': record['elapsed'],
+                                 'evaluations': record['evaluations']}))
+
+    instrumentation = new_instrumentation(progress, progress_interval=0.0)
+    return solve(filename, algorithm, seed, max(time_limit, 0.0) if time_limit is not None else None, max_evaluations,
+                 0, target_gap, bound is not None, instrumentation, stop=lambda: stop_flags[slot] != 0, **parameters)
+
+# Resumo de um trabalho para as respostas (sem a solução, que só vai no resultado)
+def job_summary(job):
+    summary = {'id': job['id'], 'status': job['status'], 'instance': job['filename'], 'algorithm': job['algorithm'],
+               'best': job['incumbents'][-1] if job['incumbents'] else None}
+    if job['error'] is not None:
+        summary['error'] = job['error']
+    return summary
+
+def new_service(workers=None, upload_dir=None):
+    # forkserver/spawn e não fork: os processos são criados a pedido, já com ligações de clientes abertas, e com fork
+    # herdariam esses sockets (a ligação só fecharia quando o processo terminasse)
+    context = mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn')
+    stop_flags = context.RawArray('b', MAX_JOBS)
+    events = context.Queue()
+    return {
+        'jobs': {},
+        'next_id': 1,
+        'stop_flags': stop_flags,
+        'free_slots': list(range(MAX_JOBS - 1, -1, -1)),
+        'events': events,
+        'pool': ProcessPoolExecutor(workers or os.cpu_count(), mp_context=context, initializer=_init_worker,
+                                    initargs=(stop_flags, events)),
+        'upload_dir': upload_dir or tempfile.mkdtemp(prefix='solve_service_'),
+        'loop': None,
+    }
+
+# Cria um trabalho a partir do pedido e envia-o para o conjunto de processos
+def submit_job(service, request):
+    algorithm = request.get('algorithm', 'grasp')
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo desconhecido: {algorithm}")
+    if not isinstance(request.get('parameters', {}), dict):
+        raise ValueError("parameters tem de ser um objeto {nome: valor}")
+    check_parameters(algorithm, request.get('parameters', {}))  # Nomes e valores, com as regras da linha de comandos
+    for name, minimum in REQUEST_LIMITS.items():
+        value = request.get(name)
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value < minimum
+                                  or name in ('seed', 'max_evaluations') and value != int(value)):
+            raise ValueError(f"Valor inválido para {name}: {value!r}")
+    if not service['free_slots']:
+        raise ValueError("Demasiados trabalhos por terminar")
+    job_id = str(service['next_id'])
+    service['next_id'] += 1
+    filename = request.get('filename')
+    uploaded = 'instance' in request
+    if uploaded:  # Instância enviada no pedido: guardada na pasta do serviço (com a cache) até ao fim do trabalho
+        filename = os.path.join(service['upload_dir'], f"job{job_id}.txt")
+        with open(filename, 'w') as file:
+            file.write(request['instance'])
+    if filename is None or not os.path.exists(filename) and not os.path.exists(filename + '.costs.npy'):
+        raise ValueError(f"Instância não encontrada: {filename}")
+
+    slot = service['free_slots'].pop()
+    service['stop_flags'][slot] = 0
+    deadline = time.time() + request['deadline'] if request.get('deadline') is not None else None
+    job = {'id': job_id, 'slot': slot, 'uploaded': uploaded, 'status': 'queued', 'filename': filename,
+           'algorithm': algorithm, 'incumbents': [], 'result': None, 'error': None, 'listeners': [],
+           'done': asyncio.Event()}
+    service['jobs'][job_id] = job
+    job['future'] = service['pool'].submit(_run_job, job_id, slot, filename, algorithm, request.get('seed', 42),
+                                           request.get('time_limit'), request.get('max_evaluations'),
+                                           request.get('target_gap'), bool(request.get('bound')), deadline,
+                                           request.get('parameters', {}))
+    job['future'].add_done_callback(lambda future: service['loop'].call_soon_threadsafe(_finish_job, service, job))
+    if deadline is not None:
+        job['timer'] = service['loop'].call_at(service['loop'].time() + request['deadline'], stop_job, service, job)
+    return job
+
+def _finish_job(service, job):
+    future = job['future']
+    if future.cancelled():
+        job['status'] = 'cancelled'
+    elif future.exception() is not None:
+        job['status'], job['error'] = 'failed', str(future.exception())
+    else:
+        job['result'] = future.result()
+        job['status'] = 'cancelled' if job['status'] == 'cancelling' else 'done'
+    if 'timer' in job:
+        job['timer'].cancel()
+    service['free_slots'].append(job['slot'])  # O processo já não lê a posição: pode ser dada a outro trabalho
+    if job['uploaded']:
+        # Instância enviada e as suas caches (<ficheiro>.costs.npy, .meta.npz, .bound.npy, .cand<k>.npy)
+        for path in glob.glob(glob.escape(job['filename']) + '*'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    _publish(job, {'status': job['status'], 'result': job['result'], 'error': job['error']})
+    job['done'].set()
+
+# Pede a paragem: um trabalho em fila é retirado, um em execução para na próxima verificação do orçamento
+def stop_job(service, job, cancel=False):
+    if job['done'].is_set():
+        return
+    if job['future'].cancel():
+        return  # Ainda não tinha começado (_finish_job é chamado pelo callback)
+    service['stop_flags'][job['slot']] = 1
+    if cancel:
+        job['status'] = 'cancelling'
+
+# Envia um evento para os clientes que estão a seguir o trabalho
+def _publish(job, event):
+    for listener in job['listeners']:
+        listener.put_nowait(event)
+
+# Lê a fila de eventos dos processos numa thread e entrega-os ao ciclo do asyncio
+def _event_reader(service):
+    while True:
+        item = service['events'].get()
+        if item is None:
+            return
+        service['loop'].call_soon_threadsafe(_record_incumbent, service, *item)
+
+def _record_incumbent(service, job_id, incumbent):
+    job = service['jobs'].get(job_id)
+    if job is None:
+        return
+    if job['status'] == 'queued':
+        job['status'] = 'running'
+    if incumbent is None:
+        return  # Só o aviso de início
+    job['incumbents'].append(incumbent)
+    _publish(job, incumbent)
+
+# Pedido HTTP mínimo: (método, caminho, corpo JSON ou None)
+async def read_request(reader):
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) < 2:
+        return None, None, None
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    body = json.loads(await reader.readexactly(length)) if length else None
+    return request_line[0], request_line[1], body
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+async def send_json(writer, status, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+# Resposta em streaming (chunked): uma linha JSON por incumbente, terminando com o resultado
+async def stream_events(writer, job):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"
+                 b"Connection: close\r\n\r\n")
+    listener = asyncio.Queue()
+    history = list(job['incumbents'])
+    if job['done'].is_set():
+        history.append({'status': job['status'], 'result': job['result'], 'error': job['error']})
+    else:
+        job['listeners'].append(listener)
+    try:
+        for event in history:
+            await _write_chunk(writer, event)
+        while not job['done'].is_set() or not listener.empty():
+            event = await listener.get()
+            await _write_chunk(writer, event)
+            if 'status' in event:
+                break
+    finally:
+        if listener in job['listeners']:
+            job['listeners'].remove(listener)
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+async def _write_chunk(writer, event):
+    line = (json.dumps(event) + "\n").encode()
+    writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+    await writer.drain()
+
+async def handle_connection(service, reader, writer):
+    try:
+        method, path, body = await read_request(reader)
+        parts = [part for part in (path or '').split('?')[0].split('/') if part]
+        job = service['jobs'].get(parts[1]) if len(parts) >= 2 and parts[0] == 'jobs' else None
+        if parts == ['jobs'] and method == 'POST':
+            try:
+                job = submit_job(service, body or {})
+            except (ValueError, TypeError) as error:
+                await send_json(writer, 400, {'error': str(error)})
+            else:
+                await send_json(writer, 201, job_summary(job))
+        elif parts == ['jobs'] and method == 'GET':
+            await send_json(writer, 200, [job_summary(job) for job in service['jobs'].values()])
+        elif job is None:
+            await send_json(writer, 404, {'error': f"Recurso desconhecido: {path}"})
+        elif len(parts) == 2 and method == 'GET':
+            await send_json(writer, 200, {**job_summary(job), 'result': job['result']})
+        elif len(parts) == 2 and method == 'DELETE':
+            stop_job(service, job, cancel=True)
+            await send_json(writer, 200, job_summary(job))
+        elif parts[2:] == ['events'] and method == 'GET':
+            await stream_events(writer, job)
+        elif parts[2:] == ['stop'] and method == 'POST':
+            stop_job(service, job)
+            await job['done'].wait()  # A pesquisa para na próxima iteração e devolve a melhor solução
+            await send_json(writer, 200, {**job_summary(job), 'result': job['result']})
+        else:
+            await send_json(writer, 405, {'error': f"Método não suportado: {method} {path}"})
+    except (ConnectionError, asyncio.IncompleteReadError, json.JSONDecodeError):
+        pass  # Cliente desligou-se ou enviou um pedido inválido
+    finally:
+        writer.close()
+
+# Arranca o serviço em host:port ou num socket Unix (unix_path) e serve até ser interrompido
+# preload: instâncias cuja cache binária (e limite inferior) é construída antes de aceitar trabalhos
+async def serve(host='127.0.0.1', port=8765, unix_path=None, workers=None, preload=()):
+    for filename in preload:
+        lower_bound(read_data(filename))
+    service = new_service(workers)
+    service['loop'] = asyncio.get_running_loop()
+    reader_thread = threading.Thread(target=_event_reader, args=(service,), daemon=True)
+    reader_thread.start()
+    handler = lambda reader, writer: handle_connection(service, reader, writer)
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(handler, unix_path)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for job in service['jobs'].values():
+            stop_job(service, job)
+        service['pool'].shutdown(wait=True, cancel_futures=True)
+        service['events'].put(None)
+        reader_thread.join()
+        if unix_path is not None and os.path.exists(unix_path):
+            os.remove(unix_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de resolução (HTTP sobre TCP ou socket Unix)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='CAMINHO', help="Escuta num socket Unix em vez de TCP")
+    parser.add_argument('-w', '--workers', type=int, help="Processos do conjunto (por omissão um por processador)")
+    parser.add_argument('--preload', nargs='*', default=[], help="Instâncias a preparar antes de aceitar trabalhos")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.preload))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import sys  # Importa a biblioteca sys para a saída do registo
+import json  # Importa a biblioteca json para o registo compacto do resultado
+import time  # Importa a biblioteca time para medir o tempo de execução
+import random  # Importa a biblioteca random para a solução inicial aleatória
+import argparse  # Importa a biblioteca argparse para a linha de comandos
+from Instance import read_data, read_sparse, read_capacitated, candidate_lists
+from Budget import new_budget, budget_limited, optimality_gap
+from LowerBound import lower_bound
+from Instrumentation import new_instrumentation, phase, report_progress, summary, profiled_run
+import HillClimb
+import Grasp
+import TabuSearch
+import Genetic
+
+# Pontos de retoma (GRASP, tabu e genético): ficheiro, intervalo em iterações/gerações e retomar do ficheiro
+CHECKPOINT_PARAMETERS = {'checkpoint': None, 'checkpoint_interval': 100, 'resume': False}
+# Parâmetros usados por omissão (os mesmos que estavam fixos em cada main())
+DEFAULT_PARAMETERS = {
+    'hill': {'num_candidates': None, 'move_type': 'customer', 'strategy': 'best', 'shuffle': False, 'sparse': None,
+             'capacitated': False},
+    'grasp': {'max_iterations': 1, 'num_candidates': None, 'elite_size': 10, 'sparse': None, 'capacitated': False,
+              **CHECKPOINT_PARAMETERS},
+    'tabu': {'max_iterations': 100, 'tabu_tenure': 10, 'max_no_improvement_iterations': 200, 'num_candidates': None,
+             'move_type': 'customer', 'sparse': None, 'capacitated': False, **CHECKPOINT_PARAMETERS},
+    'genetic': {'pop_size': 100, 'generations': 1000, 'mutation_rate': 0.01, 'cache_size': 0, 'unique': False,
+                'capacitated': False, **CHECKPOINT_PARAMETERS},
+}
+# Com um orçamento de tempo/avaliações as iterações deixam de ter limite: é o orçamento que para a pesquisa
+UNLIMITED = 10 ** 9
+# Valores aceites para os parâmetros (linha de comandos, serviço): escolhas, inteiros positivos ou não negativos e opções
+PARAMETER_CHOICES = {'move_type': ('customer', 'facility'), 'strategy': ('best', 'first')}
+POSITIVE_INTEGERS = {'num_candidates', 'sparse', 'max_iterations', 'tabu_tenure', 'max_no_improvement_iterations',
+                     'pop_size', 'generations', 'checkpoint_interval'}
+NON_NEGATIVE_INTEGERS = {'elite_size', 'cache_size'}
+FLAGS = {'shuffle', 'unique', 'resume'}
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# Verifica os nomes e os valores dos parâmetros de um algoritmo (None é o valor de omissão); ValueError se inválidos
+def check_parameters(algorithm, parameters):
+    unknown = set(parameters) - set(DEFAULT_PARAMETERS[algorithm])
+    if unknown:
+        raise ValueError(f"Parâmetros desconhecidos para {algorithm}: {sorted(unknown)}")
+    for name, value in parameters.items():
+        if value is None:
+            continue
+        if name in PARAMETER_CHOICES:
+            valid = value in PARAMETER_CHOICES[name]
+        elif name in POSITIVE_INTEGERS:
+            valid = _is_number(value) and value == int(value) and value >= 1
+        elif name in NON_NEGATIVE_INTEGERS:
+            valid = _is_number(value) and value == int(value) and value >= 0
+        elif name in FLAGS:
+            valid = isinstance(value, bool)
+        elif name == 'mutation_rate':
+            valid = _is_number(value) and 0 <= value <= 1
+        elif name == 'capacitated':
+            valid = isinstance(value, bool) or _is_number(value) and value > 0  # True ou a capacidade dos armazéns
+        else:  # checkpoint
+            valid = isinstance(value, str)
+        if not valid:
+            raise ValueError(f"Valor inválido para {name}: {value!r}")
+
+# Dados e listas de candidatos de uma execução; sparse (k): modo esparso com os k arcos mais baratos de cada cliente,
+# em que os candidatos por omissão são todos os arcos; capacitated: modo capacitado com as capacidades do ficheiro (True)
+# ou com esse valor como capacidade dos armazéns de capa/capb/capc (ver Instance.read_capacitated)
+def load_data(filename, num_candidates, sparse, capacitated=False):
+    if sparse and capacitated:
+        raise ValueError("O modo esparso e o modo capacitado não podem ser usados juntos")
+    if capacitated:
+        data = read_capacitated(filename, None if capacitated is True else capacitated)
+    else:
+        data = read_sparse(filename, sparse) if sparse else read_data(filename)
+    if num_candidates:
+        return data, candidate_lists(data, num_candidates)
+    return data, data['arcs'] if sparse else None
+
+# Solução inicial aleatória: o armazém é sorteado como no modo denso (mesma sequência do random); no modo esparso,
+# se não for um dos arcos do cliente, passa para o arco na posição armazém % k (com k = m fica sempre o sorteado)
+def random_solution(data):
+    solution = HillClimb.generate_random_solution(len(data['costs']), len(data['fixed_costs']))
+    if 'arcs' in data:
+        arcs = data['arcs']
+        for customer_idx, warehouse_idx in enumerate(solution):
+            if warehouse_idx not in arcs[customer_idx]:
+                solution[customer_idx] = int(arcs[customer_idx, warehouse_idx % arcs.shape[1]])
+    return solution
+
+# Cada algoritmo recebe (ficheiro, semente, orçamento, verbosidade, parâmetros) e devolve (solução, custo)
+def run_hill(filename, seed, budget, verbosity, num_candidates, move_type, strategy, shuffle, sparse, capacitated):
+    data, candidates = load_data(filename, num_candidates, sparse, capacitated)
+    random.seed(seed)
+    initial_solution = random_solution(data)
+    solution, cost, _ = HillClimb.local_search(initial_solution, data, budget, verbosity, candidates, move_type,
+                                             strategy, shuffle)
+    return solution, cost
+
+def run_grasp(filename, seed, budget, verbosity, max_iterations, num_candidates, elite_size, sparse, capacitated,
+              checkpoint, checkpoint_interval, resume):
+    return Grasp.grasp(filename, max_iterations, seed, budget, verbosity, num_candidates, elite_size,
+                       checkpoint=checkpoint, checkpoint_interval=checkpoint_interval, resume=resume, sparse=sparse,
+                       capacitated=capacitated)
+
+def run_tabu(filename, seed, budget, verbosity, max_iterations, tabu_tenure, max_no_improvement_iterations, num_candidates,
+             move_type, sparse, capacitated, checkpoint, checkpoint_interval, resume):
+    data, candidates = load_data(filename, num_candidates, sparse, capacitated)
+    random.seed(seed)
+    initial_solution = random_solution(data)
+    solution, cost, _ = TabuSearch.tabu_search(initial_solution, data, max_iterations, tabu_tenure,
+                                               max_no_improvement_iterations, budget=budget, verbosity=verbosity,
+                                               candidate_lists=candidates, move_type=move_type, checkpoint=checkpoint,
+                                               checkpoint_interval=checkpoint_interval, resume=resume)
+    return solution, cost
+
+def run_genetic(filename, seed, budget, verbosity, pop_size, generations, mutation_rate, cache_size, unique, capacitated,
+                checkpoint, checkpoint_interval, resume):
+    data, _ = load_data(filename, None, None, capacitated)
+    solution, cost, _ = Genetic.genetic_algorithm(data, pop_size, generations, mutation_rate, seed, budget, verbosity,
+                                                  checkpoint, checkpoint_interval, resume, cache_size, unique)
+    return solution, cost
+
+ALGORITHMS = {'hill': run_hill, 'grasp': run_grasp, 'tabu': run_tabu, 'genetic': run_genetic}
+
+# Parâmetros finais de um algoritmo: os indicados pelo utilizador ou os de omissão
+# (com orçamento limitado, os limites de iterações/gerações e de iterações sem melhoria não indicados passam a
+# ilimitados: é o orçamento que para a pesquisa)
+def algorithm_parameters(algorithm, budget, parameters):
+    defaults = dict(DEFAULT_PARAMETERS[algorithm])
+    if budget_limited(budget):
+        for name in ('max_iterations', 'generations', 'max_no_improvement_iterations'):
+            if name in defaults:
+                defaults[name] = UNLIMITED
+    defaults.update({name: value for name, value in parameters.items() if value is not None})
+    return defaults
+
+# Ponto de entrada único (API): resolve uma instância e devolve um registo compacto do resultado
+# target_gap (%): para quando a melhor solução estiver a essa distância do limite inferior (calculado pelo LowerBound)
+# with_bound: calcula o limite inferior mesmo sem target_gap, para mostrar e registar o gap
+# instrumentation (opcional, Instrumentation.new_instrumentation): o registo inclui então os contadores e tempos por fase
+# stop (opcional): função que devolve True para parar a pesquisa e devolver a melhor solução até esse momento
+def solve(filename, algorithm='grasp', seed=42, time_limit=None, max_evaluations=None, verbosity=0, target_gap=None,
+          with_bound=False, instrumentation=None, stop=None, **parameters):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo desconhecido: {algorithm}")
+    budget = new_budget(time_limit, max_evaluations, None, target_gap, instrumentation, stop)
+    with phase(budget, 'parse'):
+        data = read_data(filename)  # Constrói a cache se for preciso (os algoritmos depois só a abrem)
+    if with_bound or target_gap is not None:
+        with phase(budget, 'bound'):
+            budget['lower_bound'] = lower_bound(data)
+    start_time = time.perf_counter()
+    with phase(budget, 'solve'):
+        solution, cost = ALGORITHMS[algorithm](filename, seed, budget, verbosity,
+                                               **algorithm_parameters(algorithm, budget, parameters))
+    report_progress(budget, force=True)
+    record = {
+        'instance': filename,
+        'algorithm': algorithm,
+        'seed': seed,
+        'cost': cost,
+        'time': time.perf_counter() - start_time,
+        'evaluations': budget['evaluations'],
+        'lower_bound': budget['lower_bound'],
+        'gap': optimality_gap(budget, cost),
+        'solution': solution,
+    }
+    if instrumentation is not None:
+        record['instrumentation'] = summary(budget)
+    return record
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve uma instância com um dos algoritmos")
+    parser.add_argument('filename', help="Ficheiro da instância (formato ORLIB / Kratica)")
+    parser.add_argument('-a', '--algorithm', default='grasp', choices=list(ALGORITHMS))
+    parser.add_argument('-s', '--seed', type=int, default=42)
+    parser.add_argument('-t', '--time-limit', type=float, help="Limite de tempo (segundos)")
+    parser.add_argument('-e', '--max-evaluations', type=int, help="Limite de avaliações de custo")
+    parser.add_argument('-v', '--verbosity', type=int, default=0, choices=[0, 1, 2],
+                        help="0: só o registo final, 1: progresso dos custos, 2: também as soluções")
+    parser.add_argument('--solution', action='store_true', help="Inclui a solução no registo final")
+    parser.add_argument('-g', '--target-gap', type=float, help="Para quando o gap ao limite inferior for <= a este valor (%%)")
+    parser.add_argument('--bound', action='store_true', help="Calcula o limite inferior e regista o gap")
+    # Pontos de retoma (GRASP, tabu e genético)
+    parser.add_argument('--checkpoint', metavar='FICHEIRO', help="Guarda o estado da pesquisa neste ficheiro (.npz)")
+    parser.add_argument('--checkpoint-interval', type=int, help="Iterações/gerações entre pontos de retoma")
+    parser.add_argument('--resume', action='store_true', default=None, help="Continua a partir do ficheiro --checkpoint")
+    # Instrumentação (desligada por omissão)
+    parser.add_argument('--stats', action='store_true', help="Inclui contadores e tempos por fase no registo final")
+    parser.add_argument('--progress', type=float, metavar='SEGUNDOS',
+                        help="Escreve um registo de progresso (JSON) em stderr a cada SEGUNDOS")
+    parser.add_argument('--profile', metavar='FICHEIRO', help="Executa com cProfile e guarda as estatísticas")
+    parser.add_argument('--trace-memory', metavar='FICHEIRO',
+                        help="Executa com tracemalloc: alocações por fase e linhas com mais memória")
+    # Parâmetros dos algoritmos (por omissão os valores de DEFAULT_PARAMETERS)
+    parser.add_argument('--max-iterations', type=int, help="Iterações do GRASP / da pesquisa tabu")
+    parser.add_argument('--num-candidates', type=int, help="Só os k armazéns mais baratos de cada cliente (hill/grasp/tabu)")
+    parser.add_argument('--sparse', type=int, metavar='K',
+                        help="Modo esparso: só os K arcos mais baratos de cada cliente em memória (hill/grasp/tabu)")
+    parser.add_argument('--capacitated', nargs='?', const=True, type=float, metavar='CAPACIDADE',
+                        help="Modo capacitado (capacidades e procuras do ficheiro); em capa/capb/capc indicar a capacidade")
+    parser.add_argument('--move-type', choices=PARAMETER_CHOICES['move_type'],
+                        help="Vizinhança da pesquisa local / tabu: mudar um cliente ou abrir/fechar/trocar armazéns")
+    parser.add_argument('--strategy', choices=PARAMETER_CHOICES['strategy'],
+                        help="Pesquisa local: melhor movimento de cada passagem ou primeira melhoria com fila de clientes ativos")
+    parser.add_argument('--shuffle', action='store_true', default=None, help="Primeira melhoria por ordem aleatória dos clientes")
+    parser.add_argument('--elite-size', type=int, help="Tamanho do conjunto de elite do GRASP (0 desliga a religação de caminhos)")
+    parser.add_argument('--tabu-tenure', type=int)
+    parser.add_argument('--max-no-improvement-iterations', type=int)
+    parser.add_argument('--pop-size', type=int)
+    parser.add_argument('--generations', type=int)
+    parser.add_argument('--mutation-rate', type=float)
+    parser.add_argument('--cache-size', type=int, help="Entradas da cache LRU das fitnesses do genético (hash de Zobrist)")
+    parser.add_argument('--unique', action='store_true', default=None, help="Genético: rejeita indivíduos duplicados")
+    args = parser.parse_args(argv)
+
+    accepted = set(DEFAULT_PARAMETERS[args.algorithm])
+    parameters = {name: value for name, value in vars(args).items() if name in accepted}
+    try:
+        check_parameters(args.algorithm, parameters)
+    except ValueError as error:
+        parser.error(str(error))
+    instrumentation = None
+    if args.stats or args.progress is not None or args.trace_memory:
+        progress = (lambda record: print(json.dumps(record), file=sys.stderr, flush=True)) if args.progress is not None else None
+        instrumentation = new_instrumentation(progress, args.progress or 1.0, trace_allocations=bool(args.trace_memory))
+    result = profiled_run(solve, args.filename, args.algorithm, args.seed, args.time_limit, args.max_evaluations,
+                          args.verbosity, args.target_gap, args.bound, instrumentation,
+                          profile_path=args.profile, trace_path=args.trace_memory, **parameters)
+    if not args.solution:
+        del result['solution']
+    print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
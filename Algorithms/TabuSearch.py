@@ -1,131 +1,207 @@
 import time
 import random
-from collections import deque
+import numpy as np
+from Instance import read_data
+from Evaluation import (EPSILON, new_state, customer_deltas, all_move_deltas, all_candidate_deltas, apply_move,
+                        feasible_cost, oscillate_penalty)
+from Facilities import new_facility_state, best_facility_move, apply_facility_move
+from Budget import new_budget, budget_exhausted, record_incumbent
+from Instrumentation import count, report_progress
+from Checkpoint import save_checkpoint, load_checkpoint, python_random_state, set_python_random_state
 
-def read_data(filename):
-    with open(filename, 'r') as file:
-        lines = file.readlines()
+# Duração tabu de um movimento: valor fixo ou sorteada no intervalo (mínimo, máximo)
+def draw_tenure(tabu_tenure):
+    if isinstance(tabu_tenure, tuple):
+        return random.randint(*tabu_tenure)
+    return tabu_tenure
 
-    # Extrair o número de armazéns e clientes
-    m, n = map(int, lines[0].split())
-    data = {'warehouses': [], 'customers': []}
+# Melhor movimento admissível percorrendo cliente a cliente (O(n·m), sem ordenar a vizinhança)
+def scanned_best_move(state, data, tabu_until, iteration, aspiration_delta):
+    best_move, best_delta = None, np.inf
+    for customer_idx in range(len(data['costs'])):
+        deltas = customer_deltas(state, data, customer_idx)
+        deltas[(tabu_until[customer_idx] > iteration) & (deltas >= aspiration_delta)] = np.inf
+        new_warehouse_idx = int(deltas.argmin())
+        if deltas[new_warehouse_idx] < best_delta:
+            best_move, best_delta = (customer_idx, new_warehouse_idx), deltas[new_warehouse_idx]
+    return best_move
 
-    # Leitura dos armazéns
-    for i in range(1, m + 1):
-        parts = lines[i].split()
-        fixed_cost = float(parts[1])  # Custo fixo
-        data['warehouses'].append({'fixed_cost': fixed_cost})
+# Melhor movimento admissível com a matriz completa de variações calculada numa só passagem numpy
+def vectorized_best_move(state, data, tabu_until, iteration, aspiration_delta):
+    deltas = all_move_deltas(state, data)
+    deltas[(tabu_until > iteration) & (deltas >= aspiration_delta)] = np.inf  # Movimentos tabu sem aspiração
+    move = int(deltas.argmin())
+    if not np.isfinite(deltas.flat[move]):
+        return None
+    return divmod(move, deltas.shape[1])
 
-    line_index = m + 1
-    while line_index < len(lines):
-        # Leitura do número do cliente (ignorada, pois não é necessária)
-        customer_number = int(lines[line_index].strip())
-        line_index += 1
+# Melhor movimento admissível só entre os k armazéns candidatos de cada cliente (matriz n x k em vez de n x m)
+# No modo esparso a memória tabu é indexada pela posição do arco e os candidatos são um prefixo dos arcos
+def candidate_best_move(state, data, tabu_until, iteration, aspiration_delta, candidate_lists):
+    deltas = all_candidate_deltas(state, data, candidate_lists)
+    if 'arcs' in data:
+        tabu = tabu_until[:, :candidate_lists.shape[1]]
+    else:
+        tabu = tabu_until[np.arange(len(candidate_lists))[:, None], candidate_lists]
+    deltas[(tabu > iteration) & (deltas >= aspiration_delta)] = np.inf
+    customer_idx, position = divmod(int(deltas.argmin()), deltas.shape[1])
+    if not np.isfinite(deltas[customer_idx, position]):
+        return None
+    return customer_idx, int(candidate_lists[customer_idx, position])
 
-        # Leitura dos custos de alocação do cliente para cada armazém
-        costs = []
-        while line_index < len(lines) and not lines[line_index].strip().isdigit():
-            costs.extend(map(float, lines[line_index].strip().split()))
-            line_index += 1
+# Selecionar o melhor movimento de cliente em N(current_solution) - S(tabu) com verificações tabu em O(1)
+def customer_move(state, data, tabu_until, iteration, aspiration_delta, vectorized, candidate_lists, budget):
+    move = None
+    if candidate_lists is not None:
+        move = candidate_best_move(state, data, tabu_until, iteration, aspiration_delta, candidate_lists)
+        budget['evaluations'] += candidate_lists.size
+        if 'arcs' in data and candidate_lists.shape[1] == data['arcs'].shape[1]:
+            return move  # Os candidatos já são todos os arcos
+    if move is None and 'arcs' in data:
+        # No modo esparso a vizinhança completa são todos os arcos (nunca a matriz densa n x m)
+        move = candidate_best_move(state, data, tabu_until, iteration, aspiration_delta, data['arcs'])
+        budget['evaluations'] += data['arcs'].size
+    elif move is None:
+        # Vizinhança completa (sem candidatos ou quando todos os movimentos candidatos são tabu)
+        if vectorized:
+            move = vectorized_best_move(state, data, tabu_until, iteration, aspiration_delta)
+        else:
+            move = scanned_best_move(state, data, tabu_until, iteration, aspiration_delta)
+        budget['evaluations'] += data['costs'].size
+    return move
 
-        # Adicionar o cliente à lista com os custos combinados
-        data['customers'].append({'costs': costs})
+# Ponto de retoma da pesquisa tabu: todos os vetores do estado incremental (de cliente ou de armazém), a memória tabu,
+# a melhor solução, os contadores e o estado do random (usado pelas durações tabu aleatórias)
+def write_checkpoint(checkpoint, state, tabu_until, best_solution, best_cost, iteration, no_improvement_iterations, budget):
+    save_checkpoint(checkpoint, **{'state_' + name: value for name, value in state.items()}, tabu_until=tabu_until,
+                    best_solution=best_solution, best_cost=best_cost, iteration=iteration,
+                    no_improvement_iterations=no_improvement_iterations, random_state=python_random_state(),
+                    evaluations=budget['evaluations'])
 
-    return data
-
-def calculate_total_cost(solution, warehouses, customers):
-    total_cost = 0
-    warehouse_used = [False] * len(warehouses)  # Lista para rastrear se o armazém foi usado
-    
-    for customer_idx, warehouse_idx in enumerate(solution):
-        warehouse = warehouses[warehouse_idx]
-        customer = customers[customer_idx]
-        
-        # Adiciona o custo fixo do armazém se for a primeira vez que o armazém é usado
-        if not warehouse_used[warehouse_idx]:
-            total_cost += warehouse['fixed_cost']
-            warehouse_used[warehouse_idx] = True
-        
-        # Adiciona o custo variável do cliente para o armazém atual
-        total_cost += customer['costs'][warehouse_idx]
-    
-    return total_cost
-
-def tabu_search(initial_solution, warehouses, customers, max_iterations, tabu_tenure, max_no_improvement_iterations):
+# tabu_tenure pode ser um inteiro ou um intervalo (mínimo, máximo) para uma duração aleatória
+# verbosity: 0 não escreve nada, 1 escreve só os custos, 2 escreve também as soluções completas
+# candidate_lists (opcional): só avalia os armazéns candidatos de cada cliente, com a vizinhança completa como recurso
+# move_type: 'customer' muda um cliente de armazém; 'facility' abre, fecha ou troca armazéns (ver Facilities.py)
+# checkpoint (opcional): ficheiro onde a solução corrente, a memória tabu, a melhor solução e o estado do random são
+# guardados a cada checkpoint_interval iterações e no fim; com resume=True continua a partir desse ficheiro (se existir)
+# No modo capacitado (Instance.read_capacitated) a pesquisa segue o custo penalizado, com a penalização em oscilação
+# estratégica (Evaluation.oscillate_penalty); só as soluções viáveis contam como melhor solução
+def tabu_search(initial_solution, data, max_iterations, tabu_tenure, max_no_improvement_iterations, vectorized=True, aspiration=True,
+                budget=None, verbosity=2, candidate_lists=None, move_type='customer', checkpoint=None,
+                checkpoint_interval=100, resume=False):
     start_time = time.time()
     
-    # Inicializar a solução corrente (current_solution) e a melhor solução encontrada (best_solution).
-    current_solution = initial_solution[:]
-    best_solution = current_solution[:]
-    best_cost = calculate_total_cost(best_solution, warehouses, customers)
-    
-    # Lista tabu para armazenar soluções recentes
-    tabu_list = deque(maxlen=tabu_tenure)
-    tabu_list.append(tuple(current_solution))
+    # Inicializar a solução corrente (estado incremental) e a melhor solução encontrada (best_solution).
+    if move_type == 'facility':
+        state = new_facility_state(initial_solution, data)
+        # Memória tabu por armazém: tabu_until[j] é a iteração até à qual o armazém j não pode voltar a mudar
+        tabu_until = np.zeros(len(data['fixed_costs']), dtype=np.int64)
+    else:
+        state = new_state(initial_solution, data)
+        # Memória tabu por atributo: tabu_until[i, j] é a iteração até à qual o cliente i não pode voltar ao armazém j
+        # (no modo esparso j é a posição do arco, data['costs'] tem a forma n x k)
+        tabu_until = np.zeros(data['costs'].shape, dtype=np.int64)
+        if 'arcs' in data and candidate_lists is None:
+            candidate_lists = data['arcs']
+    best_solution = state['solution'].copy()
+    best_cost = feasible_cost(state)
     iteration = 0
     no_improvement_iterations = 0
+    budget = budget if budget is not None else new_budget()
+    
+    saved = load_checkpoint(checkpoint) if resume else None
+    if saved is not None:
+        # Retoma: o estado incremental é reposto tal como estava (incluindo o custo acumulado pelos movimentos)
+        state = {name[len('state_'):]: saved[name] for name in saved if name.startswith('state_')}
+        state = {name: float(value) if value.ndim == 0 else value for name, value in state.items()}
+        tabu_until = saved['tabu_until']
+        best_solution, best_cost = saved['best_solution'], float(saved['best_cost'])
+        iteration, no_improvement_iterations = int(saved['iteration']), int(saved['no_improvement_iterations'])
+        set_python_random_state(saved['random_state'])
+        budget['evaluations'] += int(saved['evaluations'])
+    record_incumbent(budget, best_cost)
 
-    print(f"Initial Solution: {best_solution}")
-    print(f"Initial Cost: {best_cost:.5f}")
-    print("")
+    if verbosity >= 2:
+        print(f"Initial Solution: {initial_solution}")
+    if verbosity >= 1:
+        print(f"Initial Cost: {best_cost:.5f}")
+        print("")
     
     # Inicializar o contador de iterações (iteration = 0).
-    while iteration < max_iterations and no_improvement_iterations < max_no_improvement_iterations:
-        neighborhood = []
-        
-        # Gerar vizinhança N(current_solution)
-        for customer_idx in range(len(customers)):
-            current_warehouse_idx = current_solution[customer_idx]
-            for new_warehouse_idx in range(len(warehouses)):
-                if new_warehouse_idx != current_warehouse_idx:
-                    new_solution = current_solution[:]
-                    new_solution[customer_idx] = new_warehouse_idx
-                    neighborhood.append((new_solution, calculate_total_cost(new_solution, warehouses, customers)))
+    while (iteration < max_iterations and no_improvement_iterations < max_no_improvement_iterations
+           and not budget_exhausted(budget)):
+        # Critério de aspiração: um movimento tabu é aceite se levar a uma solução melhor que a melhor encontrada
+        # (no modo capacitado, enquanto não houver uma solução viável, não há aspiração)
+        aspiration_delta = best_cost - state['total'] - EPSILON if aspiration and best_cost < np.inf else -np.inf
         
-        # Se N(current_solution) - S(tabu_list) != ∅ (indica que o algoritmo deve prosseguir apenas se houver pelo menos uma solução na vizinhança que não esteja na lista tabu)
-        neighborhood = sorted(neighborhood, key=lambda x: x[1])
-        found_better = False
+        if move_type == 'facility':
+            move, _, evaluations = best_facility_move(state, data, tabu_until > iteration, aspiration_delta)
+            budget['evaluations'] += evaluations
+            if move is None:
+                break  # Todos os movimentos são tabu
+            apply_facility_move(state, data, *move)
+            count(budget, 'facility_moves')
+            # Os armazéns abertos ou fechados não podem voltar a mudar durante a duração tabu
+            for facility_idx in move:
+                if facility_idx is not None:
+                    tabu_until[facility_idx] = iteration + 1 + draw_tenure(tabu_tenure)
+        else:
+            move = customer_move(state, data, tabu_until, iteration, aspiration_delta, vectorized, candidate_lists, budget)
+            if move is None:
+                break  # Todos os movimentos são tabu
+            
+            customer_idx, new_warehouse_idx = move
+            old_warehouse_idx = state['solution'][customer_idx]
+            apply_move(state, data, customer_idx, new_warehouse_idx)
+            oscillate_penalty(state, data)
+            count(budget, 'moves')
+            
+            # Atualizar a memória tabu: proibir o regresso do cliente ao armazém de onde saiu
+            tenure = iteration + 1 + draw_tenure(tabu_tenure)
+            if 'arcs' in data:
+                tabu_until[customer_idx, data['arcs'][customer_idx] == old_warehouse_idx] = tenure
+            else:
+                tabu_until[customer_idx, old_warehouse_idx] = tenure
         
-        for new_solution, new_cost in neighborhood:
-            if tuple(new_solution) not in tabu_list:
-                # Incrementar a iteração e selecionar a melhor solução (best_solution) em N(current_solution) - S(tabu_list)
-                current_solution = new_solution[:]
-                tabu_list.append(tuple(current_solution))
-                
-                # Se f(new_solution) < f(current_solution), então best_solution = new_solution.
-                if new_cost < best_cost:
-                    best_solution = current_solution[:]
-                    best_cost = new_cost
-                    found_better = True
-                    no_improvement_iterations = 0
-                    print(f"Iteration {iteration + 1}: Found better solution:")
-                    print(f"  Solution: {best_solution}")
-                    print(f"  Cost: {best_cost:.5f}")
-                    print("")
-                else:
-                    # Senão, N(current_solution) = N(current_solution) - new_solution
-                    neighborhood = [neighbor for neighbor in neighborhood if tuple(neighbor[0]) != tuple(new_solution)]
-                break
-        
-        if not found_better:
+        # Se f(new_solution) < f(best_solution), então best_solution = new_solution.
+        if feasible_cost(state) < best_cost - EPSILON:
+            best_solution = state['solution'].copy()
+            best_cost = feasible_cost(state)
+            no_improvement_iterations = 0
+            gap = record_incumbent(budget, best_cost)
+            count(budget, 'improvements')
+            if verbosity >= 1:
+                print(f"Iteration {iteration + 1}: Found better solution:")
+                if verbosity >= 2:
+                    print(f"  Solution: {best_solution.tolist()}")
+                print(f"  Cost: {best_cost:.5f}")
+                if gap is not None:
+                    print(f"  Gap: {gap:.3f}%")
+                print("")
+        else:
             no_improvement_iterations += 1
         
         iteration += 1
-        # Atualizar a lista tabu (S(tabu_list))
-        # A atualização da lista tabu ocorre durante a adição de novos elementos e remove automaticamente quando o limite é excedido
+        report_progress(budget, iteration=iteration)
+        if checkpoint is not None and iteration % checkpoint_interval == 0:
+            write_checkpoint(checkpoint, state, tabu_until, best_solution, best_cost, iteration,
+                             no_improvement_iterations, budget)
+    
+    if checkpoint is not None:
+        write_checkpoint(checkpoint, state, tabu_until, best_solution, best_cost, iteration, no_improvement_iterations, budget)
     
     end_time = time.time()
     execution_time = end_time - start_time
     
-    return best_solution, best_cost, execution_time
+    return best_solution.tolist(), best_cost, execution_time
 
 def generate_random_solution(num_customers, num_warehouses):
     return [random.randint(0, num_warehouses - 1) for _ in range(num_customers)]
 
 def main(filename):
     data = read_data(filename)
-    num_customers = len(data['customers'])
-    num_warehouses = len(data['warehouses'])
+    num_customers = len(data['costs'])
+    num_warehouses = len(data['fixed_costs'])
     
     # Gera uma solução inicial aleatória
     initial_solution = generate_random_solution(num_customers, num_warehouses)
@@ -134,7 +210,7 @@ def main(filename):
     max_iterations = 100  # Define o número máximo de iterações
     tabu_tenure = 10  # Define a duração da lista tabu
     max_no_improvement_iterations = 200  # Define o número máximo de iterações consecutivas sem melhoria
-    best_solution, best_cost, execution_time = tabu_search(initial_solution, data['warehouses'], data['customers'], max_iterations, tabu_tenure, max_no_improvement_iterations)
+    best_solution, best_cost, execution_time = tabu_search(initial_solution, data, max_iterations, tabu_tenure, max_no_improvement_iterations)
     
     # Exibe o resultado da Tabu Search
     print("\nMelhor solução encontrada pela Busca Tabu:")
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Os módulos de Algorithms importam-se uns aos outros pelo nome (como quando são executados a partir dessa pasta)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Algorithms'))
+
+
+def instance(*parts):
+    return os.path.join(ROOT, 'FicheirosTeste', *parts)
@@ -0,0 +1,22 @@
+import random
+import numpy as np
+from conftest import instance
+from Instance import read_data
+from Facilities import new_facility_state, apply_facility_move
+
+
+def test_incremental_total_matches_recomputed_cost():
+    data = read_data(instance('ORLIB', 'cap131.txt'))
+    num_warehouses = len(data['fixed_costs'])
+    rng = random.Random(1)
+    state = new_facility_state([rng.randrange(num_warehouses) for _ in range(len(data['costs']))], data)
+    for _ in range(100):
+        opened, closed = np.flatnonzero(state['open']), np.flatnonzero(~state['open'])
+        close_idx = int(rng.choice(opened)) if len(opened) > 1 and rng.random() < 0.6 else None
+        open_idx = int(rng.choice(closed)) if len(closed) and (close_idx is None or rng.random() < 0.5) else None
+        previous = state['total']
+        delta = apply_facility_move(state, data, close_idx, open_idx)
+        costs = np.asarray(data['costs'])[:, state['open']]
+        expected = costs.min(axis=1).sum() + data['fixed_costs'][state['open']].sum()
+        assert np.isclose(state['total'], expected)
+        assert np.isclose(previous + delta, state['total'])
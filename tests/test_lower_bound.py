@@ -0,0 +1,21 @@
+import os
+import shutil
+import numpy as np
+from conftest import instance
+from Instance import read_data, read_sparse
+from LowerBound import BOUND_VERSION, lower_bound
+
+
+def test_sparse_data_without_filename_has_no_bound():
+    data = dict(read_sparse(instance('ORLIB', 'cap71.txt'), 5), filename=None)
+    assert lower_bound(data) is None
+
+
+def test_stale_bound_cache_is_recomputed(tmp_path):
+    filename = str(tmp_path / 'cap71.txt')
+    shutil.copy(instance('ORLIB', 'cap71.txt'), filename)
+    bound = lower_bound(read_data(filename))
+    np.save(filename + '.bound.npy', np.array(1.0))  # Formato anterior (sem versão), mais recente do que a cache
+    assert lower_bound(read_data(filename)) == bound
+    assert np.load(filename + '.bound.npy')[0] == BOUND_VERSION
+    assert os.path.getmtime(filename + '.bound.npy') >= os.path.getmtime(filename + '.costs.npy')
@@ -0,0 +1,25 @@
+import pytest
+from conftest import instance
+from Service import new_service, submit_job
+
+
+@pytest.mark.parametrize('request_fields', [
+    {'algorithm': 'hill', 'parameters': {'strategy': 'bogus'}},
+    {'algorithm': 'tabu', 'parameters': {'move_type': 'warehouse'}},
+    {'algorithm': 'tabu', 'parameters': {'max_iterations': 0}},
+    {'algorithm': 'genetic', 'parameters': {'pop_size': 'many'}},
+    {'algorithm': 'genetic', 'parameters': {'mutation_rate': 2.0}},
+    {'algorithm': 'grasp', 'parameters': {'elite_size': -1}},
+    {'algorithm': 'grasp', 'time_limit': -5},
+    {'algorithm': 'grasp', 'max_evaluations': 0.5},
+])
+def test_invalid_requests_are_rejected_before_a_slot_is_taken(request_fields):
+    service = new_service(workers=1)
+    try:
+        free_slots = len(service['free_slots'])
+        with pytest.raises(ValueError):
+            submit_job(service, {'filename': instance('ORLIB', 'cap71.txt'), **request_fields})
+        assert len(service['free_slots']) == free_slots
+        assert service['jobs'] == {}
+    finally:
+        service['pool'].shutdown()
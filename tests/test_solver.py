@@ -0,0 +1,31 @@
+import pytest
+from conftest import instance
+from Budget import new_budget
+from Solver import UNLIMITED, algorithm_parameters, check_parameters, solve
+
+
+def test_budget_lifts_iteration_limits_not_set_by_the_user():
+    parameters = algorithm_parameters('tabu', new_budget(time_limit=1), {'tabu_tenure': 5})
+    assert parameters['max_iterations'] == UNLIMITED
+    assert parameters['max_no_improvement_iterations'] == UNLIMITED
+    assert parameters['tabu_tenure'] == 5
+
+
+def test_budget_keeps_iteration_limits_set_by_the_user():
+    parameters = algorithm_parameters('tabu', new_budget(time_limit=1), {'max_no_improvement_iterations': 7})
+    assert parameters['max_no_improvement_iterations'] == 7
+
+
+def test_time_limited_tabu_uses_its_budget():
+    record = solve(instance('ORLIB', 'cap71.txt'), 'tabu', seed=1, time_limit=0.5)
+    assert record['time'] >= 0.45
+
+
+def test_parameter_values_follow_the_command_line_rules():
+    check_parameters('hill', {'strategy': 'first', 'num_candidates': 10, 'capacitated': 8000.0})
+    check_parameters('genetic', {'cache_size': 0, 'unique': True, 'mutation_rate': 0.5})
+    for algorithm, parameters in [('hill', {'strategy': 'bogus'}), ('tabu', {'tabu_tenure': 2.5}),
+                                  ('genetic', {'unique': 'yes'}), ('grasp', {'capacitated': -1}),
+                                  ('hill', {'max_iterations': 10})]:
+        with pytest.raises(ValueError):
+            check_parameters(algorithm, parameters)